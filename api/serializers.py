@@ -0,0 +1,49 @@
+import json
+
+from django.urls import reverse
+
+from posts.cards import cached_fragments
+from posts.thumbnails import renditions
+
+API_POST_TIMEOUT = 60 * 60 * 24
+
+
+def dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def serialize_post(post):
+    image = None
+    if post.image:
+        image = {"url": post.image.url, "renditions": renditions(
+            post.image.name
+        )}
+    group = None
+    if post.group_id:
+        group = {"slug": post.group.slug, "title": post.group.title}
+    return dumps({
+        "id": post.pk,
+        "text": post.text,
+        "pub_date": post.pub_date.isoformat(),
+        "author": post.author.username,
+        "group": group,
+        "image": image,
+        "comment_count": post.comment_count,
+        "url": reverse("post", args=[post.author.username, post.pk]),
+    })
+
+
+def post_fragments(posts):
+    """JSON записей, собранный из кэша одним get_many; сериализуются
+    только отсутствующие."""
+    return cached_fragments(posts, "api_post", serialize_post,
+                            API_POST_TIMEOUT)
+
+
+def serialize_comment(comment):
+    return {
+        "id": comment.pk,
+        "author": comment.author.username,
+        "text": comment.text,
+        "created": comment.created.isoformat(),
+    }
@@ -0,0 +1,124 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class FeedApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="writer")
+        self.reader = User.objects.create_user(username="reader")
+        self.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        self.posts = [
+            Post.objects.create(
+                text=f"Запись {i}", author=self.author, group=self.group
+            )
+            for i in range(25)
+        ]
+        self.client = Client()
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response["Content-Type"], "application/json")
+        return response.status_code, json.loads(response.content)
+
+    def test_feeds_are_paginated_by_cursor(self):
+        urls = [
+            reverse("api:index"),
+            reverse("api:group_posts", args=[self.group.slug]),
+            reverse("api:profile", args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url):
+                status, first = self.get(url)
+                self.assertEqual(status, 200)
+                self.assertEqual(len(first["results"]), 20)
+                self.assertEqual(first["results"][0]["text"], "Запись 24")
+                self.assertIsNone(first["previous"])
+                _, second = self.get(first["next"])
+                self.assertEqual(
+                    [post["id"] for post in second["results"]],
+                    [post.pk for post in self.posts[4::-1]]
+                )
+
+    def test_since_id_returns_only_new_posts(self):
+        url = reverse("api:index")
+        latest = self.posts[-1].pk
+        with CaptureQueriesContext(connection) as queries:
+            status, data = self.get(url, since_id=latest)
+        self.assertEqual((status, data), (200, {
+            "results": [], "has_more": False,
+            "next": f"{url}?since_id={latest}",
+        }))
+        self.assertEqual(len(queries), 1)
+        post = Post.objects.create(text="Свежая", author=self.author)
+        _, data = self.get(url, since_id=latest)
+        self.assertEqual([p["id"] for p in data["results"]], [post.pk])
+
+    def test_since_id_pages_forward_without_gaps(self):
+        url = reverse("api:index")
+        _, data = self.get(url, since_id=self.posts[0].pk - 1)
+        self.assertTrue(data["has_more"])
+        self.assertEqual([p["id"] for p in data["results"]],
+                         [post.pk for post in self.posts[:20]])
+        _, data = self.get(data["next"])
+        self.assertFalse(data["has_more"])
+        self.assertEqual([p["id"] for p in data["results"]],
+                         [post.pk for post in self.posts[20:]])
+
+    def test_since_id_must_be_a_valid_id(self):
+        url = reverse("api:index")
+        for value in ("abc", "-1", "²", str(2 ** 64)):
+            with self.subTest(value):
+                self.assertEqual(self.get(url, since_id=value)[0], 400)
+
+    def test_serialized_posts_come_from_cache_until_changed(self):
+        url = reverse("api:index")
+        self.get(url)
+        Post.objects.filter(pk=self.posts[-1].pk).update(text="Тайком")
+        _, data = self.get(url)
+        self.assertEqual(data["results"][0]["text"], "Запись 24")
+        Comment.objects.create(post=self.posts[-1], author=self.reader,
+                               text="Да")
+        _, data = self.get(url)
+        self.assertEqual(data["results"][0]["comment_count"], 1)
+
+    def test_follow_feed_requires_login(self):
+        url = reverse("api:follow_index")
+        self.assertEqual(self.get(url)[0], 401)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+        _, data = self.get(url)
+        self.assertEqual(len(data["results"]), 20)
+
+    def test_post_with_comments(self):
+        post = self.posts[0]
+        Comment.objects.create(post=post, author=self.reader, text="Ок")
+        status, data = self.get(reverse("api:post", args=[post.pk]))
+        self.assertEqual(status, 200)
+        self.assertEqual(data["post"]["group"]["slug"], "group")
+        self.assertEqual(data["comments"][0]["author"], "reader")
+        self.assertIsNone(data["next"])
+        self.assertEqual(self.get(reverse("api:post", args=[0]))[0], 404)
+
+    def test_post_comments_are_paginated(self):
+        post = self.posts[0]
+        for i in range(25):
+            Comment.objects.create(post=post, author=self.reader,
+                                   text=f"Комментарий {i}")
+        _, data = self.get(reverse("api:post", args=[post.pk]))
+        self.assertEqual(len(data["comments"]), 20)
+        _, data = self.get(data["next"])
+        self.assertEqual(
+            [comment["text"] for comment in data["comments"]],
+            [f"Комментарий {i}" for i in range(20, 25)]
+        )
+        self.assertIsNone(data["next"])
@@ -0,0 +1,131 @@
+from django.db.models import F
+from django.http import HttpResponse, JsonResponse
+
+from posts.models import Group, Post, User
+from posts.paginator import (
+    CursorPaginator, decode_cursor, encode_cursor, newer_than,
+)
+from posts.views import COMMENTS_PER_PAGE
+
+from .serializers import dumps, post_fragments, serialize_comment
+
+POSTS_PER_PAGE = 20
+# Наибольшее целое SQLite: большие номера переполнили бы параметр запроса
+MAX_ID = 2 ** 63 - 1
+
+
+def error(status, detail):
+    return JsonResponse({"detail": detail}, status=status,
+                        json_dumps_params={"ensure_ascii": False})
+
+
+def json_response(fragments, **fields):
+    # Записи уже лежат в кэше готовым JSON, поэтому ответ склеивается
+    # из строк, без повторной сериализации.
+    tail = dumps(fields)[1:]
+    if fields:
+        tail = "," + tail
+    body = '{"results":[' + ",".join(fragments) + "]" + tail
+    return HttpResponse(body, content_type="application/json")
+
+
+def parse_id(value):
+    """Номер из параметра запроса или None, если это не номер."""
+    if not (value.isascii() and value.isdigit()) or int(value) > MAX_ID:
+        return None
+    return int(value)
+
+
+def feed(request, posts, date_field="pub_date"):
+    """Лента с курсорами ``before``/``after``.
+
+    С ``since_id`` отдаются записи новее этой, от старых к новым, не
+    больше страницы; ``next`` — адрес следующего опроса, ``has_more`` —
+    остались ли новые записи сверх страницы. Опрос без новых записей
+    стоит одного запроса по первичному ключу и пустого ответа.
+    """
+    since = request.GET.get("since_id")
+    if since is not None:
+        since_id = parse_id(since)
+        if since_id is None:
+            return error(400, "since_id должен быть номером записи")
+        items = list(
+            posts.filter(pk__gt=since_id).order_by("pk")[
+                :POSTS_PER_PAGE + 1
+            ]
+        )
+        has_more = len(items) > POSTS_PER_PAGE
+        items = items[:POSTS_PER_PAGE]
+        last = items[-1].pk if items else since_id
+        return json_response(
+            post_fragments(items),
+            next=f"{request.path}?since_id={last}",
+            has_more=has_more,
+        )
+    page = CursorPaginator(posts, POSTS_PER_PAGE, date_field).get_page(
+        before=request.GET.get("before"), after=request.GET.get("after"),
+    )
+    links = {
+        "next": page.next_cursor and f"{request.path}?before="
+                                     f"{page.next_cursor}",
+        "previous": page.previous_cursor and f"{request.path}?after="
+                                             f"{page.previous_cursor}",
+    }
+    return json_response(post_fragments(page.object_list), **links)
+
+
+def index(request):
+    return feed(request, Post.objects.select_related("author", "group"))
+
+
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        return error(404, "Группа не найдена")
+    return feed(request, group.posts.select_related("author", "group"))
+
+
+def profile(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return error(404, "Пользователь не найден")
+    return feed(request, author.posts.select_related("author", "group"))
+
+
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return error(401, "Нужно войти на сайт")
+    posts = Post.objects.select_related("author", "group").filter(
+        timeline_entries__user=request.user
+    ).annotate(feed_date=F("timeline_entries__pub_date"))
+    return feed(request, posts, date_field="feed_date")
+
+
+def post_detail(request, post_id):
+    """Запись и первая страница комментариев от старых к новым; ``next``
+    ведёт на следующую страницу по курсору ``after``."""
+    post = Post.objects.select_related("author", "group").filter(
+        pk=post_id
+    ).first()
+    if post is None:
+        return error(404, "Запись не найдена")
+    comments = post.comments.select_related("author").order_by(
+        "created", "pk"
+    )
+    after = decode_cursor(request.GET.get("after"))
+    if after:
+        created, pk = after
+        comments = comments.filter(newer_than("created", created, pk))
+    comments = list(comments[:COMMENTS_PER_PAGE + 1])
+    next_url = None
+    if len(comments) > COMMENTS_PER_PAGE:
+        comments = comments[:COMMENTS_PER_PAGE]
+        next_url = f"{request.path}?after=" + encode_cursor(
+            comments[-1].created, comments[-1].pk
+        )
+    body = (
+        '{"post":' + post_fragments([post])[0]
+        + ',"comments":' + dumps([serialize_comment(c) for c in comments])
+        + ',"next":' + dumps(next_url) + "}"
+    )
+    return HttpResponse(body, content_type="application/json")
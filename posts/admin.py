@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 
@@ -7,7 +8,18 @@ class PostAdmin(admin.ModelAdmin):
     list_display = ("pk", "text", "pub_date", "author")
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
-    search_fields = ("text", "author")
+    search_fields = ("text", "author__username")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Текст ищется по индексу FTS5, а не перебором LIKE '%...%'.
+        expression = search.match_expression(search_term)
+        if not expression:
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        matching = search.filter_matching(queryset, expression)
+        by_author = queryset.filter(author__username=search_term.strip())
+        return matching | by_author, False
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -1,5 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def install_search(using, **kwargs):
+    # Миграции, пересоздающие таблицы в SQLite, удаляют их триггеры.
+    from django.db import connections
+
+    from . import search
+    connection = connections[using]
+    if "posts_post_fts" in connection.introspection.table_names():
+        search.install(connection)
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(install_search, sender=self)
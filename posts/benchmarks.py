@@ -0,0 +1,195 @@
+"""Микробенчмарки горячих мест: шаблонов, форм, паджинатора и запросов
+представлений. Запускаются командой ``manage.py bench`` на заранее
+заполненной тестовой базе.
+
+Каждый бенчмарк получает набор данных и возвращает функцию без
+аргументов, время выполнения которой и замеряется.
+"""
+import time
+
+from django.core.paginator import Paginator
+from django.db.models import F
+from django.template import Context, Template
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .cards import ACTIONS_MARKER
+from .forms import CommentForm, PostForm
+from .models import Group, Post, User
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+class Dataset:
+    def __init__(self):
+        self.posts = list(
+            Post.objects.select_related("author", "group")
+            .order_by("-pub_date", "-pk")[:1000]
+        )
+        self.author = User.objects.annotate(
+            total=F("stats__posts_count")
+        ).order_by("-total", "pk").first()
+        self.reader = User.objects.annotate(
+            total=F("stats__following_count")
+        ).order_by("-total", "pk").first()
+        self.group = Group.objects.order_by("pk").first()
+        self.post = max(self.posts, key=lambda post: post.comment_count)
+
+
+@benchmark
+def post_info_template(data):
+    template = get_template("includes/post_info.html")
+    contexts = [
+        {"post": post, "actions": mark_safe(ACTIONS_MARKER)}
+        for post in data.posts[:10]
+    ]
+
+    def run():
+        for context in contexts:
+            template.render(context)
+    return run
+
+
+def _feed(name, source):
+    """Лента из 10 карточек для вошедшего зрителя, как в index.html."""
+    def setup(data):
+        template = Template(source)
+        context = Context({"page": data.posts[:10], "user": data.reader})
+        template.render(context)
+
+        def run():
+            template.render(context)
+        return run
+    setup.__name__ = name
+    return benchmark(setup)
+
+
+# Прежний способ: include карточки в цикле, по шаблону на запись.
+_feed(
+    "feed_include_per_item",
+    '{% for post in page %}{% include "includes/post_info.html" %}'
+    '{% endfor %}'
+)
+_feed(
+    "feed_post_cards",
+    "{% load post_cards %}{% post_cards page as cards %}"
+    "{% for card in cards %}{{ card }}{% endfor %}"
+)
+_feed(
+    "feed_render_post_list",
+    "{% load post_cards %}{% render_post_list page %}"
+)
+
+
+@benchmark
+def paginator_template(data):
+    template = get_template("includes/paginator.html")
+    page = Paginator(range(100000), 10).page(5000)
+
+    def run():
+        template.render({"page": page})
+    return run
+
+
+@benchmark
+def post_str(data):
+    def run():
+        for post in data.posts:
+            str(post)
+    return run
+
+
+@benchmark
+def post_form(data):
+    payload = {"text": "Новая запись " * 20, "group": data.group.pk}
+
+    def run():
+        PostForm(payload).is_valid()
+    return run
+
+
+@benchmark
+def comment_form(data):
+    def run():
+        CommentForm({"text": "Комментарий " * 10}).is_valid()
+    return run
+
+
+def _query(build):
+    def setup(data):
+        def run():
+            list(build(data))
+        return run
+    setup.__name__ = build.__name__
+    return benchmark(setup)
+
+
+FEED = Post.objects.select_related("author", "group").order_by(
+    "-pub_date", "-pk"
+)
+
+
+@_query
+def query_index(data):
+    return FEED[:11]
+
+
+@_query
+def query_group_posts(data):
+    return FEED.filter(group=data.group)[:11]
+
+
+@_query
+def query_profile(data):
+    return FEED.filter(author=data.author)[:11]
+
+
+@_query
+def query_follow_index(data):
+    return Post.objects.select_related("author", "group").filter(
+        timeline_entries__user=data.reader
+    ).annotate(
+        feed_date=F("timeline_entries__pub_date")
+    ).order_by("-feed_date", "-pk")[:11]
+
+
+@_query
+def query_post_comments(data):
+    return data.post.comments.select_related("author")
+
+
+def measure(func, min_time=0.2, repeat=5):
+    """Лучшее из ``repeat`` время одного вызова, в секундах. Число
+    вызовов в серии подбирается так, чтобы серия шла не меньше
+    ``min_time``."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    timings = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+    return min(timings)
+
+
+def compare(results, baseline, threshold):
+    """Бенчмарки, которые стали медленнее базовых больше чем на
+    ``threshold`` (доля): имя → отношение нового времени к базовому."""
+    return {
+        name: seconds / baseline[name]
+        for name, seconds in results.items()
+        if baseline.get(name) and seconds / baseline[name] > 1 + threshold
+    }
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+from . import counters, generations, timeline
+from .models import Comment, Follow, Post
+
+
+@contextmanager
+def original_dates():
+    """bulk_create проставил бы auto_now_add-полям текущее время;
+    внутри блока сохраняются даты, заданные у объектов."""
+    fields = [
+        Post._meta.get_field("pub_date"),
+        Comment._meta.get_field("created"),
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def take_write_lock():
+    """Захватывает блокировку записи SQLite в начале транзакции.
+
+    Пустой UPDATE начинает пишущую транзакцию: до её конца другие
+    процессы не могут писать, поэтому прочитанный внутри неё
+    ``Max("id")`` не займёт ни один новый объект.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE "{Post._meta.db_table}" SET "id" = "id" WHERE 0'
+        )
+
+
+def refresh_derived(author_ids, follower_ids=(), group_ids=()):
+    """Пересчитывает после массовой загрузки то, что обычно обновляют
+    сигналы: счётчики, ленты подписчиков и поколения страниц."""
+    counters.reconcile_posts()
+    counters.reconcile_users()
+    follower_ids = set(follower_ids) | set(
+        Follow.objects.filter(author_id__in=author_ids)
+        .values_list("user_id", flat=True)
+    )
+    with transaction.atomic():
+        timeline.rebuild(follower_ids)
+        generations.bump(
+            generations.page_key("index"),
+            generations.page_key("groups"),
+            *(generations.page_key("profile", pk) for pk in author_ids),
+            *(generations.page_key("group", pk) for pk in group_ids if pk),
+        )
@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.template.loader import get_template, render_to_string
+from django.utils.html import escape
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.safestring import mark_safe
+
+from yatube import replicas
+
+from . import generations
+
+CARD_TIMEOUT = 60 * 60 * 24
+ACTIONS_MARKER = "<!-- post-actions -->"
+# Метки вместо автора и номера записи в кнопках зрителя
+USERNAME_MARKER = "postauthormarker"
+ID_MARKER = 987654321
+
+
+def _generation_keys(post):
+    keys = [generations.key("post", post.pk)]
+    if post.group_id:
+        keys.append(generations.key("group", post.group_id))
+    return keys
+
+
+def fragment_key(prefix, post, found):
+    versions = ".".join(found[k] for k in _generation_keys(post))
+    return f"{prefix}:{post.pk}:{versions}"
+
+
+def _read_before_change(post, found):
+    """Сменилось ли поколение записи или её группы после того, как
+    строку прочитали: фрагмент по ней нельзя кэшировать под этим
+    поколением."""
+    read_at = getattr(post, "read_at", None)
+    return read_at is not None and any(
+        generations.changed_at(found[k]) > read_at
+        for k in _generation_keys(post)
+    )
+
+
+def cached_fragments(posts, prefix, build, timeout=CARD_TIMEOUT):
+    """Возвращает ``build(post)`` для каждой записи, беря готовые
+    значения из кэша одним get_many; ключи меняются вместе с поколением
+    записи и её группы."""
+    posts = list(posts)
+    found = generations.get_many(
+        k for post in posts for k in _generation_keys(post)
+    )
+    keys = [fragment_key(prefix, post, found) for post in posts]
+    values = cache.get_many(keys)
+    missing = {}
+    for post, key in zip(posts, keys):
+        if key not in values:
+            values[key] = build(post)
+            if not _read_before_change(post, found):
+                missing[key] = values[key]
+    # Записи, прочитанные с отстающей реплики, могут быть старше своих
+    # поколений: их карточки отдаются, но не кэшируются.
+    if missing and not replicas.lagged():
+        cache.set_many(missing, timeout)
+    return [values[key] for key in keys]
+
+
+def _render_shared(posts):
+    """Общие части карточек по шаблону, загруженному один раз."""
+    template = get_template("includes/post_info.html")
+
+    def build(post):
+        html = template.render(
+            {"post": post, "actions": mark_safe(ACTIONS_MARKER)}
+        )
+        head, tail = html.split(ACTIONS_MARKER)
+        return head, tail
+    return cached_fragments(posts, "post_card", build)
+
+
+def _actions(user, author):
+    """Функция, возвращающая кнопки зрителя для записи.
+
+    Кнопки одинаковы для всех карточек страницы с точностью до автора
+    и номера записи в ссылках, поэтому шаблон отрисовывается один раз
+    с метками, а в карточки подставляются готовые значения вместо
+    reverse() для каждой записи.
+    """
+    placeholder = SimpleNamespace(
+        id=ID_MARKER, pk=ID_MARKER,
+        author=SimpleNamespace(username=USERNAME_MARKER),
+    )
+    html = render_to_string(
+        "includes/post_actions.html",
+        {"post": placeholder, "user": user, "author": author}
+    )
+    if USERNAME_MARKER not in html and str(ID_MARKER) not in html:
+        return lambda post: html
+
+    def fill(post):
+        # Так же экранирует аргументы и reverse().
+        username = quote(post.author.username, safe=RFC3986_SUBDELIMS + "/~:@")
+        return html.replace(USERNAME_MARKER, escape(username)).replace(
+            str(ID_MARKER), str(post.pk)
+        )
+    return fill
+
+
+def render_cards(posts, user, author=None):
+    """Возвращает HTML карточек записей.
+
+    Общая часть карточки берётся из кэша, отрисовываются только
+    отсутствующие; кнопки, зависящие от зрителя, подставляются
+    в каждую карточку отдельно.
+    """
+    posts = list(posts)
+    actions = _actions(user, author)
+    return [
+        mark_safe(head + actions(post) + tail)
+        for post, (head, tail) in zip(posts, _render_shared(posts))
+    ]
+
+
+def render_post_list(posts, user, author=None, separator=""):
+    """Вся лента карточек одной строкой за один проход."""
+    return mark_safe(separator.join(render_cards(posts, user, author)))
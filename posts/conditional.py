@@ -0,0 +1,47 @@
+import hashlib
+from functools import wraps
+
+from django.middleware.csrf import get_token
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                quote_etag)
+
+from yatube import replicas
+
+
+def revalidate(request, *validators):
+    """Считает ETag страницы и возвращает 304, если у клиента та же версия.
+
+    ``validators`` — то, от чего зависит страница (поколения кэша,
+    счётчики и т. п.). К ним добавляются зритель и, для вошедших, секрет
+    CSRF: в страницах есть имя пользователя и формы с CSRF-токеном.
+    """
+    user, secret = 0, ""
+    if request.user.is_authenticated:
+        user = request.user.pk
+        # Заводит секрет до отрисовки, чтобы cookie в ответе совпала
+        # с тем, что вошло в ETag.
+        get_token(request)
+        secret = request.META["CSRF_COOKIE"]
+    if replicas.lagged():
+        # Страница собрана с отстающей реплики: ETag с новыми поколениями
+        # закрепил бы у клиента старые данные.
+        return None
+    parts = (user, secret, request.get_full_path(), *validators)
+    digest = hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()
+    request.etag = quote_etag(digest)
+    return get_conditional_response(request, etag=request.etag)
+
+
+def conditional_page(view):
+    """Проставляет ETag, посчитанный в ``revalidate``, и требует от
+    браузера проверять страницу при каждом показе: страница зависит от
+    зрителя, поэтому кэшировать её могут только клиенты."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        etag = getattr(request, "etag", None)
+        if etag and response.status_code in (200, 304):
+            response["ETag"] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserStats
+
+BATCH_SIZE = 1000
+
+USER_COUNTERS = {
+    "posts_count": (Post, "author"),
+    "followers_count": (Follow, "author"),
+    "following_count": (Follow, "user"),
+}
+
+
+def _bumped(field, delta):
+    # Счётчик мог разойтись с таблицей и уже стоять на нуле; уход ниже
+    # нуля нарушил бы CHECK и уронил обычное удаление.
+    return Greatest(F(field) + delta, Value(0))
+
+
+def bump_user(user_id, **deltas):
+    UserStats.objects.filter(user_id=user_id).update(**{
+        field: _bumped(field, delta) for field, delta in deltas.items()
+    })
+
+
+def bump_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=_bumped("comment_count", delta)
+    )
+
+
+def _count(queryset, field):
+    counted = queryset.filter(**{field: OuterRef("pk")}).order_by().values(
+        field
+    ).annotate(total=Count("pk")).values("total")
+    return Coalesce(Subquery(counted), Value(0))
+
+
+def _id_batches(model, batch_size):
+    ids = model.objects.order_by("pk").values_list("pk", flat=True)
+    last = 0
+    while True:
+        batch = list(ids.filter(pk__gt=last)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def reconcile_posts(batch_size=BATCH_SIZE):
+    fixed = 0
+    for batch in _id_batches(Post, batch_size):
+        with transaction.atomic():
+            fixed += Post.objects.filter(pk__in=batch).exclude(
+                comment_count=_count(Comment.objects, "post")
+            ).update(comment_count=_count(Comment.objects, "post"))
+    return fixed
+
+
+def reconcile_users(batch_size=BATCH_SIZE):
+    fixed = 0
+    for batch in _id_batches(User, batch_size):
+        with transaction.atomic():
+            UserStats.objects.bulk_create(
+                [UserStats(user_id=user_id) for user_id in batch],
+                ignore_conflicts=True
+            )
+            actual = {
+                name: _count(model.objects, field)
+                for name, (model, field) in USER_COUNTERS.items()
+            }
+            stale = list(
+                UserStats.objects.filter(user_id__in=batch).annotate(**{
+                    f"actual_{name}": value for name, value in actual.items()
+                }).exclude(**{
+                    name: F(f"actual_{name}") for name in actual
+                }).values_list("user_id", flat=True)
+            )
+            if stale:
+                fixed += UserStats.objects.filter(
+                    user_id__in=stale
+                ).update(**actual)
+    return fixed
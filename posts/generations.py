@@ -0,0 +1,66 @@
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from yatube import replicas
+
+
+def key(*parts):
+    return "generation:" + ":".join(str(part) for part in parts)
+
+
+def page_key(*scope):
+    return key("page", *scope)
+
+
+def _new():
+    # Время смены в начале значения: по нему запрос с отстающей реплики
+    # узнаёт, что читает данные старше поколения.
+    return f"{time.time_ns():x}-{uuid4().hex[:16]}"
+
+
+def changed_at(value):
+    try:
+        return int(value.partition("-")[0], 16) / 1e9
+    except ValueError:
+        return 0
+
+
+def _renew(keys):
+    cache.set_many({k: _new() for k in keys}, None)
+
+
+def bump(*keys):
+    """Сменяет поколения сразу и ещё раз после коммита.
+
+    Вторая смена нужна, чтобы страница, отрисованная по данным до
+    коммита, не осталась в кэше под новым поколением.
+    """
+    _renew(keys)
+    transaction.on_commit(lambda: _renew(keys))
+
+
+def get_many(keys):
+    """Текущие поколения; отсутствующие (в том числе вытесненные из
+    кэша) заводятся заново, так что старые ключи не переиспользуются."""
+    keys = set(keys)
+    found = cache.get_many(keys)
+    missing = {k: _new() for k in keys - found.keys()}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    replicas.catch_up(max(map(changed_at, found.values()), default=0))
+    return found
+
+
+def token(*keys):
+    found = get_many(keys)
+    return ".".join(found[k] for k in keys)
+
+
+def page_token(*scope):
+    """Поколение закэшированной ленты: меняется при изменении записей
+    самой ленты и при переименовании любой группы."""
+    return token(page_key(*scope), page_key("groups"))
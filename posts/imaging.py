@@ -0,0 +1,43 @@
+"""Подготовка вариантов изображения записи.
+
+Модуль выполняется в процессах пула и не зависит от Django: получает
+пути к файлам и ничего не знает о хранилище и моделях.
+"""
+import os
+
+from PIL import Image, ImageOps
+
+SAVE_OPTIONS = {
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+    "WEBP": {"quality": 80, "method": 4},
+}
+
+
+def _prepare(image, largest):
+    # JPEG можно декодировать сразу в уменьшенном масштабе: это заметно
+    # быстрее, чем читать большой снимок целиком.
+    image.draft("RGB", largest)
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info
+                              else "RGB")
+    return image
+
+
+def render(source, targets):
+    """Сохраняет кадры ``targets`` — список (путь, (ширина, высота),
+    формат) — с обрезкой по центру. Файлы пишутся во временный файл и
+    переименовываются, поэтому недописанный вариант никогда не отдаётся.
+    """
+    largest = max((size for _, size, _ in targets), key=lambda s: s[0])
+    with Image.open(source) as original:
+        image = _prepare(original, largest)
+        for path, size, image_format in targets:
+            frame = ImageOps.fit(image, size, Image.LANCZOS)
+            if image_format == "JPEG" and frame.mode != "RGB":
+                frame = frame.convert("RGB")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            frame.save(temporary, image_format, **SAVE_OPTIONS[image_format])
+            os.replace(temporary, path)
+    return [path for path, _, _ in targets]
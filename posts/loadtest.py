@@ -0,0 +1,230 @@
+"""Нагрузочный прогон: потоки-«пользователи» запрашивают страницы сайта
+по заданной смеси и замеряют время ответа.
+
+Запросы идут либо по HTTP к запущенному серверу, либо прямо в
+WSGI-приложение через тестовый клиент Django, без сети.
+"""
+import http.cookiejar
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+MIX = {
+    "index": 30,
+    "group_posts": 15,
+    "profile": 15,
+    "post": 20,
+    "follow_index": 10,
+    "new_post": 5,
+    "add_comment": 5,
+}
+AUTHENTICATED = {"follow_index", "new_post", "add_comment"}
+PERCENTILES = (50, 95, 99)
+
+
+class Targets:
+    """Случайные адреса из заранее выбранных пользователей, групп и
+    записей, чтобы во время прогона не обращаться к базе."""
+
+    def __init__(self, usernames, slugs, posts):
+        self.usernames = usernames
+        self.slugs = slugs
+        self.posts = posts
+
+    def request(self, name, rng):
+        if name == "index":
+            return "GET", reverse("index"), None
+        if name == "group_posts":
+            return "GET", reverse("group_posts", args=[
+                rng.choice(self.slugs)
+            ]), None
+        if name == "profile":
+            return "GET", reverse("profile", args=[
+                rng.choice(self.usernames)
+            ]), None
+        if name == "follow_index":
+            return "GET", reverse("follow_index"), None
+        if name == "new_post":
+            text = f"Запись нагрузочного теста {rng.random()}"
+            return "POST", reverse("new_post"), {"text": text}
+        username, post_id = rng.choice(self.posts)
+        if name == "post":
+            return "GET", reverse("post", args=[username, post_id]), None
+        return "POST", reverse("add_comment", args=[username, post_id]), {
+            "text": "Комментарий нагрузочного теста"
+        }
+
+
+class ClientSession:
+    """Запросы прямо в WSGI-обработчик Django."""
+
+    def __init__(self, host):
+        # Адрес не из INTERNAL_IPS, иначе ответы раздует debug_toolbar.
+        self.client = Client(HTTP_HOST=host, REMOTE_ADDR="10.0.0.1")
+
+    def login(self, username, password):
+        return self.client.login(username=username, password=password)
+
+    def send(self, method, url, data):
+        # Тестовый клиент пробрасывает исключения представлений; для
+        # нагрузочного теста это такие же ошибки 500, как у сервера.
+        try:
+            if method == "GET":
+                return self.client.get(url).status_code
+            return self.client.post(url, data).status_code
+        except Exception:
+            return 500
+
+    def close(self):
+        connections.close_all()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPSession:
+    """Запросы по HTTP к запущенному серверу, с сессией в cookie."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect
+        )
+
+    def _csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == "csrftoken":
+                return cookie.value
+        return ""
+
+    def login(self, username, password):
+        url = reverse("login")
+        self.send("GET", url, None)
+        status = self.send(
+            "POST", url, {"username": username, "password": password}
+        )
+        return status == 302
+
+    def send(self, method, url, data):
+        body = None
+        if data is not None:
+            body = urllib.parse.urlencode(data).encode()
+        request = urllib.request.Request(
+            self.base_url + url, data=body, method=method,
+            headers={
+                "X-CSRFToken": self._csrf_token(),
+                "Referer": self.base_url + url,
+            },
+        )
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+        except OSError:
+            # Соединение не установлено или оборвано.
+            return 599
+
+    def close(self):
+        pass
+
+
+def percentile(values, share):
+    """Процентиль по ближайшему рангу; ``values`` отсортированы."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * share // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(samples, elapsed):
+    by_name = defaultdict(list)
+    errors = defaultdict(int)
+    for name, latency, status in samples:
+        by_name[name].append(latency)
+        if status >= 400:
+            errors[name] += 1
+    endpoints = {}
+    for name, latencies in sorted(by_name.items()):
+        latencies.sort()
+        endpoints[name] = {
+            "requests": len(latencies),
+            "errors": errors[name],
+            "rps": round(len(latencies) / elapsed, 2),
+            **{
+                f"p{p}_ms": round(percentile(latencies, p) * 1000, 2)
+                for p in PERCENTILES
+            },
+        }
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "requests": len(samples),
+        "errors": sum(errors.values()),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0,
+        "endpoints": endpoints,
+    }
+
+
+def _worker(session, user, targets, mix, deadline, budget, seed, samples):
+    rng = random.Random(seed)
+    names = [
+        name for name in mix if user or name not in AUTHENTICATED
+    ]
+    weights = [mix[name] for name in names]
+    own = []
+    try:
+        if user and not session.login(*user):
+            raise RuntimeError(f"Не удалось войти как {user[0]}")
+        while time.monotonic() < deadline and budget():
+            name = rng.choices(names, weights)[0]
+            method, url, data = targets.request(name, rng)
+            started = time.perf_counter()
+            status = session.send(method, url, data)
+            own.append((name, time.perf_counter() - started, status))
+    finally:
+        session.close()
+        samples.extend(own)
+
+
+def run(make_session, targets, users, threads, duration, requests=0,
+        mix=MIX, seed=1):
+    """Запускает ``threads`` потоков на ``duration`` секунд (или до
+    ``requests`` запросов) и возвращает сводку по адресам.
+
+    ``users`` — пары (логин, пароль) для потоков; поток без пары
+    (None) ходит анонимно и не открывает страницы для авторизованных.
+    """
+    samples = []
+    counter = iter(range(requests)) if requests else None
+
+    def budget():
+        return counter is None or next(counter, None) is not None
+
+    deadline = time.monotonic() + duration
+    workers = [
+        threading.Thread(
+            target=_worker,
+            args=(make_session(), users[i % len(users)], targets, mix,
+                  deadline, budget, seed + i, samples),
+        )
+        for i in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return summarize(samples, time.perf_counter() - started)
@@ -0,0 +1,100 @@
+import json
+import os
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import benchmarks
+
+BASELINE = os.path.join(settings.BASE_DIR, "benchmarks.json")
+DATASET = {
+    "--users": "300", "--groups": "10", "--posts": "3000",
+    "--comments": "3000", "--images": "0", "--seed": "42",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Микробенчмарки шаблонов, форм, Post.__str__ и запросов "
+        "представлений на тестовой базе с фиксированными данными; "
+        "сравнивает результат с сохранённой базовой линией"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names", nargs="*",
+            help=f"Запустить только эти: {', '.join(benchmarks.BENCHMARKS)}",
+        )
+        parser.add_argument("--baseline", default=BASELINE)
+        parser.add_argument(
+            "--save", action="store_true",
+            help="Записать результаты как новую базовую линию",
+        )
+        parser.add_argument(
+            "--threshold", type=float, default=0.15,
+            help="Допустимое замедление, доля (0.15 — на 15%%)",
+        )
+        parser.add_argument("--min-time", type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        names = options["names"] or list(benchmarks.BENCHMARKS)
+        unknown = set(names) - benchmarks.BENCHMARKS.keys()
+        if unknown:
+            raise CommandError(f"Нет бенчмарков: {', '.join(unknown)}")
+        results = self.run(names, options["min_time"])
+        baseline = {}
+        if os.path.exists(options["baseline"]):
+            with open(options["baseline"], encoding="utf-8") as source:
+                baseline = json.load(source)
+        slower = benchmarks.compare(results, baseline, options["threshold"])
+        self.report(results, baseline, slower)
+        if options["save"]:
+            with open(options["baseline"], "w", encoding="utf-8") as output:
+                json.dump({**baseline, **results}, output, indent=2,
+                          sort_keys=True)
+                output.write("\n")
+        elif slower:
+            raise CommandError(
+                f"Замедлились: {', '.join(sorted(slower))}"
+            )
+
+    def run(self, names, min_time):
+        # Отдельная тестовая база и кэш в памяти: замеры не зависят от
+        # рабочих данных и не засоряют общий кэш.
+        old_name = connection.settings_dict["NAME"]
+        with override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }}):
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                call_command(
+                    "seed_loadtest",
+                    *(f"{k}={v}" for k, v in DATASET.items()),
+                    stdout=StringIO(),
+                )
+                data = benchmarks.Dataset()
+                return {
+                    name: benchmarks.measure(
+                        benchmarks.BENCHMARKS[name](data), min_time
+                    )
+                    for name in names
+                }
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def report(self, results, baseline, slower):
+        self.stdout.write(
+            f"{'бенчмарк':<22}{'мкс':>12}{'база, мкс':>12}{'разница':>10}"
+        )
+        for name, seconds in results.items():
+            line = f"{name:<22}{seconds * 1e6:>12.1f}"
+            if baseline.get(name):
+                change = seconds / baseline[name] - 1
+                line += f"{baseline[name] * 1e6:>12.1f}{change:>+10.1%}"
+            if name in slower:
+                line = self.style.ERROR(line + "  замедление")
+            self.stdout.write(line)
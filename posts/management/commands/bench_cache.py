@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from yatube.cache import SQLiteCache
+
+VALUE = {"html": "<div class='card'>" + "x" * 2000 + "</div>", "id": 1}
+
+
+def _write_from_child(cache, keys):
+    cache.set_many({key: VALUE for key in keys})
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает скорость и общий для процессов доступ у LocMemCache, "
+        "FileBasedCache и SQLiteCache"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ops", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        ops = options["ops"]
+        directory = tempfile.mkdtemp()
+        params = {"TIMEOUT": 300, "OPTIONS": {"MAX_ENTRIES": ops * 20}}
+        backends = {
+            "LocMemCache": LocMemCache("bench", params),
+            "FileBasedCache": FileBasedCache(
+                os.path.join(directory, "files"), params
+            ),
+            "SQLiteCache": SQLiteCache(
+                os.path.join(directory, "cache.sqlite3"), params
+            ),
+        }
+        self.stdout.write(
+            f"{'backend':<16}{'set/s':>10}{'get/s':>10}"
+            f"{'get_many(10)/s':>16}{'incr/s':>10}{'общий':>8}"
+        )
+        try:
+            for name, cache in backends.items():
+                self.stdout.write(
+                    f"{name:<16}" + self.measure(cache, ops)
+                )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def rate(self, func, count):
+        started = time.perf_counter()
+        func()
+        return f"{count / (time.perf_counter() - started):>10.0f}"
+
+    def measure(self, cache, ops):
+        keys = [f"bench:{i}" for i in range(ops)]
+        cache.clear()
+        set_rate = self.rate(
+            lambda: [cache.set(key, VALUE) for key in keys], ops
+        )
+        get_rate = self.rate(lambda: [cache.get(key) for key in keys], ops)
+        batches = [keys[i:i + 10] for i in range(0, ops, 10)]
+        many_rate = self.rate(
+            lambda: [cache.get_many(batch) for batch in batches],
+            len(batches)
+        )
+        cache.set("bench:counter", 0)
+        incr_rate = self.rate(
+            lambda: [cache.incr("bench:counter") for _ in range(ops)], ops
+        )
+        shared_keys = [f"shared:{i}" for i in range(10)]
+        child = multiprocessing.Process(
+            target=_write_from_child, args=(cache, shared_keys)
+        )
+        child.start()
+        child.join()
+        shared = len(cache.get_many(shared_keys)) * 100 // len(shared_keys)
+        return (
+            f"{set_rate}{get_rate}{many_rate:>16}{incr_rate}{shared:>7}%"
+        )
@@ -0,0 +1,130 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+from functools import partial
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import loadtest
+from posts.management.commands import loadtest as loadtest_command
+from posts.management.commands.seed_loadtest import PREFIX
+from yatube.sqlite.base import PRAGMAS
+
+DATASET = {
+    "--users": "300", "--groups": "10", "--posts": "3000",
+    "--comments": "3000", "--images": "0", "--seed": "42",
+}
+READS = {"index": 30, "group_posts": 15, "profile": 15, "post": 20}
+MODES = {
+    # Настройки SQLite по умолчанию и новое соединение на каждый запрос.
+    "journal": ({
+        "journal_mode": "DELETE", "synchronous": "FULL", "mmap_size": 0,
+        "cache_size": -2000, "temp_store": "DEFAULT",
+    }, 0),
+    "production": (PRAGMAS, 600),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает пропускную способность чтения в режиме журнала SQLite "
+        "по умолчанию и в боевом режиме (WAL, прагмы, постоянные "
+        "соединения), пока параллельно публикуются новые записи"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=1)
+        parser.add_argument(
+            "--duration", type=float, default=10,
+            help="Длительность прогона каждого режима в секундах",
+        )
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        test_settings = connection.settings_dict["TEST"]
+        old_test_name = test_settings["NAME"]
+        old_name = connection.settings_dict["NAME"]
+        old_options = connection.settings_dict["OPTIONS"]
+        old_max_age = connection.settings_dict["CONN_MAX_AGE"]
+        # Отдельная база-файл: в памяти нет ни журнала, ни конкуренции.
+        # Кэш отключён, чтобы чтения доходили до базы; лимиты частоты —
+        # чтобы записи доходили до неё же, а не получали 429.
+        test_settings["NAME"] = os.path.join(directory, "bench.sqlite3")
+        try:
+            with override_settings(CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+            }}, THUMBNAIL_WORKERS=0, RATE_LIMITS={}):
+                connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True
+                )
+                call_command(
+                    "seed_loadtest",
+                    *(f"{k}={v}" for k, v in DATASET.items()),
+                    stdout=StringIO(),
+                )
+                targets = loadtest_command.Command().targets(
+                    random.Random(1)
+                )
+                self.stdout.write(
+                    f"{'режим':<12}{'чтений/с':>10}{'p95, мс':>10}"
+                    f"{'записей/с':>11}{'ошибок':>8}"
+                )
+                for mode, (pragmas, max_age) in MODES.items():
+                    connection.close()
+                    connection.settings_dict["OPTIONS"] = {
+                        **old_options, "pragmas": pragmas,
+                    }
+                    connection.settings_dict["CONN_MAX_AGE"] = max_age
+                    self.report(mode, self.run(targets, options))
+        finally:
+            connection.close()
+            connection.settings_dict["OPTIONS"] = old_options
+            connection.settings_dict["CONN_MAX_AGE"] = old_max_age
+            test_settings["NAME"] = old_test_name
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def run(self, targets, options):
+        make_session = partial(
+            loadtest.ClientSession, settings.ALLOWED_HOSTS[0]
+        )
+        writers = [
+            (username, PREFIX)
+            for username in targets.usernames[:options["writers"]]
+        ]
+        results = {}
+
+        def write():
+            results["writes"] = loadtest.run(
+                make_session, targets, writers, len(writers),
+                options["duration"], mix={"new_post": 1},
+            )
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        results["reads"] = loadtest.run(
+            make_session, targets, [None], options["readers"],
+            options["duration"], mix=READS,
+        )
+        writer.join()
+        return results
+
+    def report(self, mode, results):
+        reads, writes = results["reads"], results["writes"]
+        p95 = max(
+            (row["p95_ms"] for row in reads["endpoints"].values()),
+            default=0,
+        )
+        self.stdout.write(
+            f"{mode:<12}{reads['rps']:>10.1f}{p95:>10.1f}"
+            f"{writes['rps']:>11.1f}"
+            f"{reads['errors'] + writes['errors']:>8}"
+        )
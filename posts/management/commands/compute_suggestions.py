@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        "Считает рекомендации «кого читать» по подпискам друзей; без "
+        "--all — только для пользователей, чьи подписки изменились"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Пересчитать рекомендации всех пользователей",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=suggestions.CHUNK_SIZE,
+            help="Сколько пользователей обрабатывать за раз",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=suggestions.SUGGESTIONS_PER_USER,
+            help="Сколько рекомендаций хранить на пользователя",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = suggestions.run(
+            options["all"], options["chunk_size"], options["limit"]
+        )
+        self.stdout.write(
+            f"Пользователей: {total}, "
+            f"{time.perf_counter() - started:.1f} с"
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Ослабляет веса ленты популярного пропорционально времени с "
+        "прошлого запуска и убирает из неё затухшие записи; "
+        "запускается по расписанию, например раз в 10 минут"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=600,
+            help="Период запуска в секундах; используется, если время "
+                 "прошлого прохода неизвестно",
+        )
+
+    def handle(self, *args, **options):
+        elapsed, removed = trending.decay_since_last(options["interval"])
+        self.stdout.write(
+            f"Прошло {elapsed:.0f} с, выбыло записей: {removed}"
+        )
@@ -0,0 +1,195 @@
+import os
+import random
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from posts.bulk import original_dates
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.paginator import CursorPaginator, newer_than
+from posts.views import COMMENTS_PER_PAGE, POSTS_PER_PAGE
+
+ALIAS = "query_plans"
+# На какой глубине ленты строится курсор «глубокой» страницы;
+# короткие ленты берутся с середины
+DEPTH = 5000
+FEED_INDEXES = (
+    "posts_post_author_date",
+    "posts_post_group_date",
+    "posts_post_date_id",
+    "posts_comment_post_created",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет отдельную SQLite-базу и печатает EXPLAIN QUERY PLAN "
+        "запросов лент до и после добавления составных индексов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--db", default=os.path.join(
+                tempfile.gettempdir(), "yatube_query_plans.sqlite3"
+            ),
+            help="Файл базы для замеров (будет создан при необходимости)",
+        )
+        parser.add_argument("--posts", type=int, default=1_000_000)
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--groups", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        connections.databases[ALIAS] = {
+            **connections.databases["default"],
+            "NAME": options["db"],
+        }
+        call_command("migrate", database=ALIAS, verbosity=0)
+        if not Post.objects.using(ALIAS).exists():
+            self.seed(options)
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("ANALYZE")
+        queries = self.queries()
+        with transaction.atomic(using=ALIAS):
+            sid = transaction.savepoint(using=ALIAS)
+            with connections[ALIAS].cursor() as cursor:
+                for name in FEED_INDEXES:
+                    cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+            self.explain("До", queries)
+            transaction.savepoint_rollback(sid, using=ALIAS)
+            self.explain("После", queries)
+
+    def seed(self, options):
+        rng = random.Random(options["seed"])
+        db = Post.objects.db_manager(ALIAS)
+        self.stdout.write(f"Заполняем {options['db']}...")
+        User.objects.db_manager(ALIAS).bulk_create(
+            [User(username=f"user{i}") for i in range(options["users"])],
+        )
+        Group.objects.db_manager(ALIAS).bulk_create(
+            [
+                Group(title=f"Группа {i}", slug=f"group{i}", description="")
+                for i in range(options["groups"])
+            ],
+        )
+        user_ids = list(
+            User.objects.using(ALIAS).values_list("id", flat=True)
+        )
+        group_ids = list(
+            Group.objects.using(ALIAS).values_list("id", flat=True)
+        )
+        start = timezone.now() - timedelta(seconds=options["posts"])
+        batch = []
+        # Без original_dates bulk_create дал бы всем записям одно время,
+        # и планы строились бы не по похожей на настоящую ленте.
+        with original_dates():
+            for i in range(options["posts"]):
+                batch.append(Post(
+                    text=f"Запись {i}",
+                    pub_date=start + timedelta(seconds=i),
+                    author_id=rng.choice(user_ids),
+                    group_id=rng.choice(group_ids + [None]),
+                ))
+                if len(batch) == 10000:
+                    db.bulk_create(batch)
+                    batch = []
+            db.bulk_create(batch)
+        Follow.objects.db_manager(ALIAS).bulk_create(
+            [
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id in user_ids[:1000]
+                for author_id in set(rng.sample(user_ids, 20)) - {user_id}
+            ],
+        )
+        # Ленты подписок заполнялись бы сигналами; bulk_create их не
+        # посылает, поэтому ленты собираются здесь, как в timeline.rebuild.
+        for user_id in user_ids[:1000]:
+            TimelineEntry.objects.db_manager(ALIAS).bulk_create(
+                [
+                    TimelineEntry(user_id=user_id, post_id=post_id,
+                                  pub_date=pub_date)
+                    for post_id, pub_date in Post.objects.using(ALIAS)
+                    .filter(author__following__user_id=user_id)
+                    .order_by("-pub_date")
+                    .values_list("id", "pub_date")
+                    [:settings.TIMELINE_MAX_LENGTH]
+                ],
+            )
+        post_ids = list(
+            Post.objects.using(ALIAS).values_list("id", flat=True)[:100000]
+        )
+        Comment.objects.db_manager(ALIAS).bulk_create(
+            [
+                Comment(
+                    post_id=rng.choice(post_ids),
+                    author_id=rng.choice(user_ids),
+                    text="Комментарий",
+                )
+                for _ in range(options["posts"] // 10)
+            ],
+        )
+
+    def queries(self):
+        """Запросы страниц так, как их строят представления: те же
+        фильтры и тот же CursorPaginator, первая страница и страница
+        в глубине ленты."""
+        user = User.objects.using(ALIAS).order_by("id").first()
+        group = Group.objects.using(ALIAS).order_by("id").first()
+        post = Comment.objects.using(ALIAS).order_by("id").first().post
+        feeds = {
+            "index": (Post.objects.using(ALIAS), "pub_date"),
+            "group_posts": (group.posts.all(), "pub_date"),
+            "profile": (user.posts.all(), "pub_date"),
+            "follow_index": (Post.objects.using(ALIAS).filter(
+                timeline_entries__user=user
+            ).annotate(feed_date=F("timeline_entries__pub_date")),
+                "feed_date"),
+        }
+        queries = {}
+        for name, (feed, date_field) in feeds.items():
+            feed = feed.select_related("author", "group")
+            paginator = CursorPaginator(feed, POSTS_PER_PAGE, date_field)
+            queries[name] = paginator.page_query()[0]
+            depth = min(DEPTH, feed.count() // 2)
+            deep = list(
+                feed.order_by(f"-{date_field}", "-pk")[depth:depth + 1]
+            )
+            if deep:
+                cursor = paginator.cursor_for(deep[0])
+                queries[f"{name} (глубокая страница)"] = (
+                    paginator.page_query(before=cursor)[0]
+                )
+                queries[f"{name} (назад с глубокой страницы)"] = (
+                    paginator.page_query(after=cursor)[0]
+                )
+        queries["profile (подписка)"] = Follow.objects.using(ALIAS).filter(
+            author=user, user=user
+        )[:1]
+        comments = post.comments.select_related("author").order_by(
+            "created", "pk"
+        )
+        queries["post (комментарии)"] = comments[:COMMENTS_PER_PAGE + 1]
+        first = comments.first()
+        if first is not None:
+            queries["post_comments (следующая порция)"] = comments.filter(
+                newer_than("created", first.created, first.pk)
+            )[:COMMENTS_PER_PAGE + 1]
+        return queries
+
+    def explain(self, title, queries):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"=== {title}"))
+        with connections[ALIAS].cursor() as cursor:
+            for name, queryset in queries.items():
+                sql, params = queryset.query.get_compiler(
+                    using=ALIAS
+                ).as_sql()
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                self.stdout.write(self.style.SQL_TABLE(name))
+                for row in cursor.fetchall():
+                    self.stdout.write(f"  {row[-1]}")
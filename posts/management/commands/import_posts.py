@@ -0,0 +1,176 @@
+import gzip
+import json
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import original_dates, refresh_derived, take_write_lock
+from posts.models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 1000
+
+
+def read_records(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as source:
+        for number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                raise CommandError(f"Строка {number}: {error}")
+            if record.get("type") not in ("post", "comment", "follow"):
+                raise CommandError(f"Строка {number}: неизвестный тип записи")
+            yield record
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает записи, комментарии и подписки из JSON Lines "
+        "(формат export_posts) пакетами bulk_create; счётчики, ленты "
+        "и кэш пересчитываются один раз в конце"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Файл .jsonl или .jsonl.gz")
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE,
+            help="Сколько строк выгрузки загружать в одной транзакции",
+        )
+
+    def handle(self, *args, **options):
+        self.users = dict(User.objects.values_list("username", "id"))
+        self.groups = dict(Group.objects.values_list("slug", "id"))
+        self.post_ids = {}
+        self.authors = set()
+        self.group_ids = set()
+        self.followers = set()
+        self.loaded = {"post": 0, "comment": 0, "follow": 0}
+        self.skipped = 0
+        self.orphans = set()
+        records = read_records(options["source"])
+        # Поисковые триггеры остаются на месте: без них в индекс не
+        # попали бы и записи, опубликованные на сайте во время загрузки.
+        with original_dates():
+            while True:
+                batch = list(islice(records, options["batch_size"]))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    # Номера выдаются внутри транзакции под блокировкой
+                    # записи, поэтому не совпадут с номерами объектов,
+                    # созданных на сайте между пакетами.
+                    take_write_lock()
+                    self.next_id = {
+                        model: (model.objects.aggregate(
+                            last=Max("id")
+                        )["last"] or 0) + 1
+                        for model in (Post, Comment)
+                    }
+                    self.load(batch)
+        refresh_derived(self.authors, self.followers, self.group_ids)
+        self.stdout.write(
+            ", ".join(f"{k}: {v}" for k, v in self.loaded.items())
+            + f"; пропущено: {self.skipped}"
+        )
+        if self.orphans:
+            listed = ", ".join(map(str, sorted(self.orphans)[:20]))
+            more = " …" if len(self.orphans) > 20 else ""
+            self.stderr.write(
+                f"Пропущены комментарии к записям, которых нет в файле "
+                f"({len(self.orphans)}): {listed}{more}"
+            )
+
+    def resolve(self, mapping, model, field, values, build):
+        """Дополняет словарь «имя → id», заводя недостающие объекты."""
+        missing = set(values) - mapping.keys() - {None}
+        if missing:
+            model.objects.bulk_create(
+                [build(value) for value in missing], ignore_conflicts=True
+            )
+            mapping.update(
+                model.objects.filter(**{f"{field}__in": missing})
+                .values_list(field, "id")
+            )
+
+    def load(self, batch):
+        kinds = {"post": [], "comment": [], "follow": []}
+        for record in batch:
+            kinds[record["type"]].append(record)
+        self.resolve(
+            self.users, User, "username",
+            [r["author"] for r in batch]
+            + [r["user"] for r in kinds["follow"]],
+            lambda username: User(
+                username=username, password=make_password(None)
+            ),
+        )
+        self.resolve(
+            self.groups, Group, "slug",
+            [r["group"] for r in kinds["post"]],
+            lambda slug: Group(slug=slug, title=slug, description=""),
+        )
+        self.load_posts(kinds["post"])
+        self.load_comments(kinds["comment"])
+        self.load_follows(kinds["follow"])
+
+    def take_id(self, model):
+        pk = self.next_id[model]
+        self.next_id[model] += 1
+        return pk
+
+    def load_posts(self, records):
+        posts = []
+        for record in records:
+            post = Post(
+                id=self.take_id(Post),
+                text=record["text"],
+                pub_date=parse_datetime(record["pub_date"]),
+                author_id=self.users[record["author"]],
+                group_id=self.groups.get(record["group"]),
+                image=record.get("image") or "",
+            )
+            self.post_ids[record["id"]] = post.id
+            self.authors.add(post.author_id)
+            self.group_ids.add(post.group_id)
+            posts.append(post)
+        Post.objects.bulk_create(posts)
+        self.loaded["post"] += len(posts)
+
+    def load_comments(self, records):
+        comments = []
+        for record in records:
+            post_id = self.post_ids.get(record["post"])
+            if post_id is None:
+                self.skipped += 1
+                self.orphans.add(record["post"])
+                continue
+            comments.append(Comment(
+                id=self.take_id(Comment),
+                post_id=post_id,
+                author_id=self.users[record["author"]],
+                text=record["text"],
+                created=parse_datetime(record["created"]),
+            ))
+        Comment.objects.bulk_create(comments)
+        self.loaded["comment"] += len(comments)
+
+    def load_follows(self, records):
+        follows = [
+            Follow(
+                user_id=self.users[record["user"]],
+                author_id=self.users[record["author"]],
+            )
+            for record in records
+            if record["user"] != record["author"]
+        ]
+        self.skipped += len(records) - len(follows)
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        self.followers.update(follow.user_id for follow in follows)
+        self.authors.update(follow.author_id for follow in follows)
+        self.loaded["follow"] += len(follows)
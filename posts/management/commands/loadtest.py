@@ -0,0 +1,152 @@
+import json
+import random
+import subprocess
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from posts import loadtest
+from posts.management.commands.seed_loadtest import PREFIX
+from posts.models import Group, Post, User
+
+SAMPLE_SIZE = 1000
+
+
+def parse_mix(value):
+    mix = dict(loadtest.MIX)
+    for part in filter(None, value.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in mix:
+            raise CommandError(f"Неизвестный адрес в смеси: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагружает сайт смесью запросов к лентам, записям, подпискам, "
+        "новым записям и комментариям и печатает пропускную способность "
+        "и p50/p95/p99 по каждому адресу. Данные — из seed_loadtest"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Адрес запущенного сервера, например "
+                 "http://127.0.0.1:8000; без него запросы идут прямо "
+                 "в WSGI-приложение без ограничения частоты (RATE_LIMITS)",
+        )
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--duration", type=float, default=30,
+            help="Длительность прогона в секундах",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=0,
+            help="Остановиться после стольких запросов",
+        )
+        parser.add_argument(
+            "--anonymous", type=float, default=0.25,
+            help="Доля потоков без входа на сайт",
+        )
+        parser.add_argument(
+            "--mix", default="",
+            help="Веса адресов, например index=50,new_post=0",
+        )
+        parser.add_argument("--password", default=PREFIX)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Записать результат в JSON")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        targets = self.targets(rng)
+        threads = options["threads"]
+        anonymous = round(threads * options["anonymous"])
+        users = [None] * anonymous + [
+            (username, options["password"])
+            for username in rng.sample(
+                targets.usernames, min(threads - anonymous,
+                                       len(targets.usernames))
+            )
+        ]
+        if options["url"]:
+            make_session = partial(loadtest.HTTPSession, options["url"])
+        else:
+            make_session = partial(
+                loadtest.ClientSession, settings.ALLOWED_HOSTS[0]
+            )
+        # Все потоки приходят с одного адреса, и с лимитами записи
+        # мерили бы ответы 429, а не работу сайта.
+        with override_settings(RATE_LIMITS={}):
+            result = loadtest.run(
+                make_session, targets, users, threads, options["duration"],
+                options["requests"], parse_mix(options["mix"]),
+                options["seed"],
+            )
+        self.report(result)
+        if options["output"]:
+            result["meta"] = {
+                "started": timezone.now().isoformat(),
+                "revision": git_revision(),
+                "target": options["url"] or "wsgi",
+                **{
+                    key: options[key]
+                    for key in ("threads", "duration", "requests",
+                                "anonymous", "mix", "seed")
+                },
+            }
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(result, output, ensure_ascii=False, indent=2,
+                          sort_keys=True)
+
+    def targets(self, rng):
+        usernames = list(
+            User.objects.filter(username__startswith=f"{PREFIX}_")
+            .values_list("username", flat=True)
+        )
+        if not usernames:
+            raise CommandError("Нет данных: сначала запустите seed_loadtest")
+        posts = list(
+            Post.objects.filter(author__username__startswith=f"{PREFIX}_")
+            .order_by("-pub_date")
+            .values_list("author__username", "id")[:SAMPLE_SIZE * 10]
+        )
+        return loadtest.Targets(
+            usernames,
+            list(Group.objects.values_list("slug", flat=True)),
+            rng.sample(posts, min(SAMPLE_SIZE, len(posts))),
+        )
+
+    def report(self, result):
+        self.stdout.write(
+            f"{'адрес':<14}{'запросов':>10}{'ошибок':>8}{'rps':>9}"
+            f"{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}"
+        )
+        rows = list(result["endpoints"].items())
+        rows.append(("всего", {
+            "requests": result["requests"], "errors": result["errors"],
+            "rps": result["rps"],
+        }))
+        for name, row in rows:
+            self.stdout.write(
+                f"{name:<14}{row['requests']:>10}{row['errors']:>8}"
+                f"{row['rps']:>9.1f}"
+                + "".join(
+                    f"{row[f'p{p}_ms']:>10.1f}" if f"p{p}_ms" in row
+                    else f"{'':>10}"
+                    for p in loadtest.PERCENTILES
+                )
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = "Пересобирает ленты подписок из таблиц Follow и Post"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "usernames", nargs="*",
+            help="Пересобрать ленты только этих пользователей",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options["usernames"]:
+            user_ids = list(
+                User.objects.filter(username__in=options["usernames"])
+                .values_list("id", flat=True)
+            )
+        with transaction.atomic():
+            count = timeline.rebuild(user_ids)
+        self.stdout.write(f"Пересобрано лент: {count}")
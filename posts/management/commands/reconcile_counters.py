@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики комментариев, записей и подписок"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=counters.BATCH_SIZE,
+            help="Сколько строк пересчитывать в одной транзакции",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        posts = counters.reconcile_posts(batch_size)
+        users = counters.reconcile_users(batch_size)
+        self.stdout.write(
+            f"Исправлено записей: {posts}, пользователей: {users}"
+        )
@@ -0,0 +1,50 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from posts import imaging, thumbnails
+from posts.models import Post
+from posts.signals import renditions_ready
+
+
+class Command(BaseCommand):
+    help = "Готовит недостающие варианты изображений записей"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Пересоздать варианты, даже если они уже есть",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Число процессов (по умолчанию — по числу ядер)",
+        )
+
+    def handle(self, *args, **options):
+        posts = [
+            post for post in Post.objects.exclude(image="").only(
+                "image", "author_id", "group_id"
+            ).iterator()
+            if options["force"] or thumbnails.missing(post.image.name)
+        ]
+        rendered = 0
+        with ProcessPoolExecutor(options["workers"]) as pool:
+            jobs = {
+                pool.submit(
+                    imaging.render,
+                    default_storage.path(post.image.name),
+                    thumbnails.targets(post.image.name),
+                ): post
+                for post in posts
+            }
+            for job in as_completed(jobs):
+                post = jobs[job]
+                try:
+                    job.result()
+                except Exception as error:
+                    self.stderr.write(f"{post.image.name}: {error}")
+                    continue
+                renditions_ready(post.pk, post.author_id, post.group_id)
+                rendered += 1
+        self.stdout.write(f"Подготовлено изображений: {rendered}")
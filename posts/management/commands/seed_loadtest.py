@@ -0,0 +1,194 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from posts import imaging, search, thumbnails
+from posts.bulk import original_dates, refresh_derived
+from posts.models import Comment, Follow, Group, Post, User
+
+PREFIX = "loadtest"
+CHUNK = 10000
+
+
+def popularity(count, alpha):
+    """Веса по закону Ципфа: у первых по рангу пользователей
+    непропорционально много подписчиков и записей."""
+    return [1 / (rank + 1) ** alpha for rank in range(count)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу данными для нагрузочного теста: пользователи "
+        f"{PREFIX}_N со степенным распределением подписчиков, записи "
+        "с картинками в группах и комментарии"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=20000)
+        parser.add_argument("--comments", type=int, default=40000)
+        parser.add_argument(
+            "--follows", type=int, default=30,
+            help="Среднее число подписок у пользователя",
+        )
+        parser.add_argument(
+            "--alpha", type=float, default=1.1,
+            help="Показатель степенного распределения популярности",
+        )
+        parser.add_argument(
+            "--images", type=int, default=20,
+            help="Сколько разных картинок завести",
+        )
+        parser.add_argument(
+            "--image-share", type=float, default=0.3,
+            help="Доля записей с картинкой",
+        )
+        parser.add_argument("--days", type=int, default=90)
+        parser.add_argument("--password", default=PREFIX)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--clear", action="store_true",
+            help="Сначала удалить данные предыдущего заполнения",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        if options["clear"]:
+            self.clear()
+        search.drop_triggers()
+        try:
+            with original_dates():
+                user_ids = self.seed_users(options)
+                group_ids = self.seed_groups(options)
+                images = self.seed_images(options)
+                self.seed_follows(options, user_ids)
+                post_ids = self.seed_posts(
+                    options, user_ids, group_ids, images
+                )
+                self.seed_comments(options, user_ids, post_ids)
+        finally:
+            search.install(rebuild=True)
+        refresh_derived(user_ids, user_ids, group_ids)
+        self.stdout.write(
+            f"Пользователей: {len(user_ids)}, групп: {len(group_ids)}, "
+            f"записей: {len(post_ids)}; пароль: {options['password']}"
+        )
+
+    def clear(self):
+        with transaction.atomic():
+            User.objects.filter(username__startswith=f"{PREFIX}_").delete()
+            Group.objects.filter(slug__startswith=f"{PREFIX}-").delete()
+
+    def bulk(self, model, objects):
+        objects = list(objects)
+        for start in range(0, len(objects), CHUNK):
+            with transaction.atomic():
+                model.objects.bulk_create(objects[start:start + CHUNK])
+
+    def seed_users(self, options):
+        password = make_password(options["password"])
+        self.bulk(User, (
+            User(username=f"{PREFIX}_{i}", password=password)
+            for i in range(options["users"])
+        ))
+        return list(
+            User.objects.filter(username__startswith=f"{PREFIX}_")
+            .order_by("id").values_list("id", flat=True)
+        )
+
+    def seed_groups(self, options):
+        self.bulk(Group, (
+            Group(
+                title=f"Сообщество {i}", slug=f"{PREFIX}-{i}",
+                description="Группа для нагрузочного теста",
+            )
+            for i in range(options["groups"])
+        ))
+        return list(
+            Group.objects.filter(slug__startswith=f"{PREFIX}-")
+            .values_list("id", flat=True)
+        )
+
+    def seed_images(self, options):
+        names = []
+        for i in range(options["images"]):
+            buffer = BytesIO()
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            Image.new("RGB", (1600, 1067), color).save(buffer, "JPEG")
+            name = default_storage.save(
+                f"posts/{PREFIX}_{i}.jpg", ContentFile(buffer.getvalue())
+            )
+            imaging.render(
+                default_storage.path(name), thumbnails.targets(name)
+            )
+            names.append(name)
+        return names
+
+    def seed_follows(self, options, user_ids):
+        weights = popularity(len(user_ids), options["alpha"])
+        follows = []
+        for user_id in user_ids:
+            count = min(
+                len(user_ids) - 1,
+                int(self.rng.expovariate(1 / options["follows"])) + 1
+            )
+            authors = set(self.rng.choices(user_ids, weights, k=count))
+            follows.extend(
+                Follow(user_id=user_id, author_id=author_id)
+                for author_id in authors - {user_id}
+            )
+        self.bulk(Follow, follows)
+
+    def seed_posts(self, options, user_ids, group_ids, images):
+        # Популярные авторы пишут чаще, но разница мягче, чем в числе
+        # подписчиков.
+        weights = popularity(len(user_ids), options["alpha"] / 2)
+        now = timezone.now()
+        span = timedelta(days=options["days"]).total_seconds()
+        moments = sorted(
+            self.rng.uniform(0, span) for _ in range(options["posts"])
+        )
+        authors = self.rng.choices(user_ids, weights, k=options["posts"])
+        self.bulk(Post, (
+            Post(
+                text=f"Запись {i} о жизни сообщества и новостях",
+                pub_date=now - timedelta(seconds=span - moment),
+                author_id=author_id,
+                group_id=self.rng.choice(group_ids + [None]),
+                image=(
+                    self.rng.choice(images)
+                    if images and self.rng.random() < options["image_share"]
+                    else ""
+                ),
+            )
+            for i, (moment, author_id) in enumerate(zip(moments, authors))
+        ))
+        return list(
+            Post.objects.filter(author_id__in=user_ids)
+            .values_list("id", "pub_date")
+        )
+
+    def seed_comments(self, options, user_ids, posts):
+        if not posts:
+            return
+        now = timezone.now()
+        comments = []
+        for _ in range(options["comments"]):
+            post_id, pub_date = self.rng.choice(posts)
+            delay = timedelta(seconds=self.rng.expovariate(1 / 3600))
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=self.rng.choice(user_ids),
+                text="Интересно, спасибо!",
+                created=min(now, pub_date + delay),
+            ))
+        self.bulk(Comment, comments)
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Обслуживание базы SQLite: обновляет статистику планировщика, "
+        "сливает индексы поиска, переносит WAL в основной файл и при "
+        "большой доле свободных страниц выполняет VACUUM. Рассчитана на "
+        "запуск по расписанию, например раз в сутки из cron"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--vacuum", action="store_true",
+            help="Выполнить VACUUM независимо от доли свободных страниц",
+        )
+        parser.add_argument(
+            "--vacuum-threshold", type=float, default=0.2,
+            help="Доля свободных страниц, начиная с которой нужен VACUUM",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "sqlite":
+            raise CommandError("Команда рассчитана только на SQLite")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+            self.stdout.write("ANALYZE выполнен")
+            self.optimize_search(cursor)
+            free = self.free_share(cursor)
+            if options["vacuum"] or free >= options["vacuum_threshold"]:
+                # VACUUM переписывает файл целиком и на это время
+                # блокирует запись, поэтому не выполняется без нужды.
+                cursor.execute("VACUUM")
+                self.stdout.write(
+                    f"VACUUM выполнен, свободных страниц было {free:.0%}"
+                )
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            busy, log, moved = cursor.fetchone()
+            if busy:
+                self.stdout.write(self.style.WARNING(
+                    "WAL перенесён не полностью: базу держат читатели"
+                ))
+            else:
+                self.stdout.write(f"WAL перенесён: {moved} из {log} страниц")
+
+    def optimize_search(self, cursor):
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+        tables = {name for name, in cursor.fetchall()}
+        for fts in search.SOURCES:
+            if fts in tables:
+                cursor.execute(
+                    f"INSERT INTO {fts} ({fts}) VALUES ('optimize')"
+                )
+                self.stdout.write(f"Индекс {fts} слит")
+
+    def free_share(self, cursor):
+        cursor.execute("PRAGMA page_count")
+        pages, = cursor.fetchone()
+        cursor.execute("PRAGMA freelist_count")
+        free, = cursor.fetchone()
+        return free / pages if pages else 0
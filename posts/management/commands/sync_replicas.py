@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from yatube import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Копирует основную базу SQLite в файлы реплик из "
+        "DATABASE_REPLICAS; с --interval повторяет копирование, пока "
+        "не будет остановлена"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Период копирования в секундах; 0 — скопировать один раз",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                "Реплики не настроены: задайте YATUBE_DB_REPLICAS"
+            )
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                started = time.perf_counter()
+                replicas.sync(alias)
+                self.stdout.write(
+                    f"{alias}: {time.perf_counter() - started:.3f} с"
+                )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,62 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_timelines(apps, schema_editor):
+    Follow = apps.get_model("posts", "Follow")
+    Post = apps.get_model("posts", "Post")
+    TimelineEntry = apps.get_model("posts", "TimelineEntry")
+    db = schema_editor.connection.alias
+    user_ids = Follow.objects.using(db).order_by("user_id").values_list(
+        "user_id", flat=True
+    ).distinct()
+    for user_id in list(user_ids):
+        # distinct: повторные подписки удаляются только в 0013.
+        posts = Post.objects.using(db).filter(
+            author__following__user_id=user_id
+        ).distinct().order_by("-pub_date").values_list(
+            "id", "pub_date"
+        )[:settings.TIMELINE_MAX_LENGTH]
+        TimelineEntry.objects.using(db).bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=post_id,
+                              pub_date=pub_date)
+                for post_id, pub_date in posts
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_auto_20210227_1524'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date'], name='posts_timeline_user_date'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='timelineentry',
+            unique_together={('user', 'post')},
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
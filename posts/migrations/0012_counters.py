@@ -0,0 +1,58 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field, db):
+    counted = model.objects.using(db).filter(**{field: OuterRef("pk")}).order_by(
+    ).values(field).annotate(total=Count("pk")).values("total")
+    return Coalesce(Subquery(counted), Value(0))
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    Follow = apps.get_model("posts", "Follow")
+    UserStats = apps.get_model("posts", "UserStats")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    db = schema_editor.connection.alias
+    Post.objects.using(db).update(comment_count=count_of(Comment, "post", db))
+    UserStats.objects.using(db).bulk_create(
+        UserStats(user_id=user_id)
+        for user_id in User.objects.using(db).values_list("pk", flat=True)
+    )
+    UserStats.objects.using(db).update(
+        posts_count=count_of(Post, "author", db),
+        followers_count=count_of(Follow, "author", db),
+        following_count=count_of(Follow, "user", db),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:14
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field, db):
+    counted = model.objects.using(db).filter(**{field: OuterRef("pk")}).order_by(
+    ).values(field).annotate(total=Count("pk")).values("total")
+    return Coalesce(Subquery(counted), Value(0))
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model("posts", "Follow")
+    UserStats = apps.get_model("posts", "UserStats")
+    db = schema_editor.connection.alias
+    follows = Follow.objects.using(db)
+    keep = follows.values("user", "author").annotate(
+        first=Min("id")
+    ).values("first")
+    deleted, _ = follows.exclude(id__in=keep).delete()
+    if deleted:
+        # 0012 посчитала подписки вместе с повторами.
+        UserStats.objects.using(db).update(
+            followers_count=count_of(Follow, "author", db),
+            following_count=count_of(Follow, "user", db),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created'], name='posts_comment_post_created'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='posts_post_author_date'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='posts_post_group_date'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', '-id'], name='posts_post_date_id'),
+        ),
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='posts_follow_unique'),
+        ),
+    ]
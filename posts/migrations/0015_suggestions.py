@@ -0,0 +1,41 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='suggestions_stale',
+            field=models.BooleanField(db_index=True, default=True, verbose_name='Рекомендации устарели'),
+        ),
+        migrations.CreateModel(
+            name='Suggestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Вес')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='suggestion',
+            index=models.Index(fields=['user', '-score'], name='posts_suggestion_user_score'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='suggestion',
+            unique_together={('user', 'author')},
+        ),
+    ]
@@ -1,5 +1,8 @@
+import time
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.query import ModelIterable
 
 User = get_user_model()
 
@@ -13,6 +16,26 @@ class Group(models.Model):
         return self.title
 
 
+class PostIterable(ModelIterable):
+    """Записи с отметкой ``read_at`` — временем перед их запросом.
+
+    По ней кэш карточек узнаёт, что поколение записи сменилось уже
+    после чтения строки и данные могут быть старше поколения.
+    """
+
+    def __iter__(self):
+        read_at = time.time()
+        for post in super().__iter__():
+            post.read_at = read_at
+            yield post
+
+
+class PostQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._iterable_class = PostIterable
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name="Текст сообщения",
@@ -37,6 +60,13 @@ class Post(models.Model):
         help_text="Выберите группу"
     )
     image = models.ImageField(upload_to="posts/", blank=True, null=True)
+    comment_count = models.PositiveIntegerField(
+        "Число комментариев",
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         short_text = self.text[:50]
@@ -44,6 +74,20 @@ class Post(models.Model):
 
     class Meta:
         ordering = ("-pub_date",)
+        indexes = (
+            models.Index(
+                fields=("author", "-pub_date", "-id"),
+                name="posts_post_author_date",
+            ),
+            models.Index(
+                fields=("group", "-pub_date", "-id"),
+                name="posts_post_group_date",
+            ),
+            models.Index(
+                fields=("-pub_date", "-id"),
+                name="posts_post_date_id",
+            ),
+        )
 
 
 class Comment(models.Model):
@@ -69,6 +113,14 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=("post", "created"),
+                name="posts_comment_post_created",
+            ),
+        )
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -81,3 +133,112 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name="following"
     )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "author"),
+                name="posts_follow_unique",
+            ),
+        )
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline"
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries"
+    )
+    pub_date = models.DateTimeField("Дата публикации")
+
+    class Meta:
+        ordering = ("-pub_date",)
+        unique_together = ("user", "post")
+        indexes = (
+            models.Index(
+                fields=("user", "-pub_date"),
+                name="posts_timeline_user_date",
+            ),
+        )
+
+
+class UserStatsManager(models.Manager):
+    def for_user(self, user):
+        try:
+            return user.stats
+        except self.model.DoesNotExist:
+            stats, _ = self.get_or_create(
+                user=user,
+                defaults={
+                    "posts_count": user.posts.count(),
+                    "followers_count": user.following.count(),
+                    "following_count": user.follower.count(),
+                }
+            )
+            return stats
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats"
+    )
+    posts_count = models.PositiveIntegerField("Записей", default=0)
+    followers_count = models.PositiveIntegerField("Подписчиков", default=0)
+    following_count = models.PositiveIntegerField("Подписок", default=0)
+    # Подписки изменились после последнего расчёта рекомендаций
+    suggestions_stale = models.BooleanField(
+        "Рекомендации устарели", default=True, db_index=True
+    )
+
+    objects = UserStatsManager()
+
+
+class Suggestion(models.Model):
+    """Рекомендация «кого читать», посчитанная командой
+    compute_suggestions."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="suggestions"
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    score = models.FloatField("Вес")
+
+    class Meta:
+        ordering = ("-score",)
+        unique_together = ("user", "author")
+        indexes = (
+            models.Index(
+                fields=("user", "-score"),
+                name="posts_suggestion_user_score",
+            ),
+        )
+
+
+class TrendingScore(models.Model):
+    """Вес записи в ленте популярного: растёт с каждым комментарием и
+    периодически уменьшается командой decay_trending."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="trending"
+    )
+    score = models.FloatField("Вес")
+
+    class Meta:
+        indexes = (
+            models.Index(fields=("-score",), name="posts_trending_score"),
+        )
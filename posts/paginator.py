@@ -0,0 +1,142 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import SimpleLazyObject
+
+
+def encode_cursor(date, pk):
+    raw = f"{date.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date, pk = raw.split("|")
+        date = parse_datetime(date)
+        pk = int(pk)
+    except (ValueError, UnicodeError, binascii.Error):
+        return None
+    if date is None:
+        return None
+    return date, pk
+
+
+# Отдельное условие-диапазон по дате нужно SQLite: по одному «или» он
+# не сужает поиск по индексу (..., дата) и сортирует всё, что лежит за
+# курсором, так что страница дорожала бы с глубиной.
+def older_than(date_field, date, pk):
+    """Условие «старше курсора (дата, id)»."""
+    return Q(**{f"{date_field}__lte": date}) & (
+        Q(**{f"{date_field}__lt": date}) | Q(pk__lt=pk)
+    )
+
+
+def newer_than(date_field, date, pk):
+    """Условие «новее курсора (дата, id)»."""
+    return Q(**{f"{date_field}__gte": date}) & (
+        Q(**{f"{date_field}__gt": date}) | Q(pk__gt=pk)
+    )
+
+
+class LazyList:
+    """Список, который загружается при первом обращении к элементам."""
+
+    def __init__(self, load):
+        self._load = load
+        self._items = None
+
+    def _get(self):
+        if self._items is None:
+            self._items = list(self._load())
+        return self._items
+
+    def __len__(self):
+        return len(self._get())
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __getitem__(self, index):
+        return self._get()[index]
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (дата, id) без COUNT и OFFSET.
+
+    Страница выбирается курсором ``before`` (записи старше курсора) или
+    ``after`` (записи новее курсора); без курсора отдаются самые свежие
+    записи. Возвращается обычный ``Page`` с дополнительными атрибутами
+    ``next_cursor`` и ``previous_cursor``.
+    """
+
+    def __init__(self, object_list, per_page, date_field="pub_date"):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.date_field = date_field
+
+    def _older(self, date, pk):
+        return older_than(self.date_field, date, pk)
+
+    def _newer(self, date, pk):
+        return newer_than(self.date_field, date, pk)
+
+    def page_query(self, before=None, after=None):
+        """Запрос строк страницы — на одну больше, чтобы узнать, есть ли
+        продолжение, — и курсоры, по которым он построен. Для страниц
+        новее курсора строки идут от старых к новым."""
+        newer_cursor = decode_cursor(after)
+        older_cursor = None if newer_cursor else decode_cursor(before)
+        if newer_cursor:
+            queryset = self.object_list.filter(
+                self._newer(*newer_cursor)
+            ).order_by(self.date_field, "pk")
+        else:
+            queryset = self.object_list.order_by(
+                f"-{self.date_field}", "-pk"
+            )
+            if older_cursor:
+                queryset = queryset.filter(self._older(*older_cursor))
+        return queryset[:self.per_page + 1], newer_cursor, older_cursor
+
+    def get_page(self, before=None, after=None):
+        queryset, newer_cursor, older_cursor = self.page_query(before, after)
+        items = list(queryset)
+        if newer_cursor:
+            has_newer = len(items) > self.per_page
+            has_older = True
+            items = items[:self.per_page][::-1]
+        else:
+            has_newer = older_cursor is not None
+            has_older = len(items) > self.per_page
+            items = items[:self.per_page]
+        page = Paginator(items, self.per_page).page(1)
+        page.previous_cursor = None
+        page.next_cursor = None
+        if items and has_newer:
+            page.previous_cursor = self.cursor_for(items[0])
+        if items and has_older:
+            page.next_cursor = self.cursor_for(items[-1])
+        return page
+
+    def get_lazy_page(self, before=None, after=None):
+        """``get_page``, который обращается к базе, только когда шаблон
+        читает записи или курсоры страницы. Если вся лента взята из
+        кэша фрагментов, страница не стоит ни одного запроса."""
+        page = SimpleLazyObject(lambda: self.get_page(before, after))
+        items = LazyList(lambda: page.object_list)
+        lazy_page = Page(items, 1, Paginator(items, self.per_page))
+        lazy_page.previous_cursor = SimpleLazyObject(
+            lambda: page.previous_cursor
+        )
+        lazy_page.next_cursor = SimpleLazyObject(lambda: page.next_cursor)
+        return lazy_page
+
+    def cursor_for(self, obj):
+        return encode_cursor(getattr(obj, self.date_field), obj.pk)
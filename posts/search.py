@@ -0,0 +1,224 @@
+"""Полнотекстовый поиск по записям и комментариям на SQLite FTS5.
+
+Таблицы posts_post_fts и posts_comment_fts хранят только индекс
+(external content) и обновляются триггерами, поэтому в синхронизации
+участвуют и массовые ``update()``/``delete()``, минуя сигналы.
+"""
+import base64
+import binascii
+import re
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# Совпадения в комментариях весят вдвое меньше совпадений в записи;
+# bm25() отрицателен, и лучшие результаты идут первыми.
+COMMENT_WEIGHT = 0.5
+MARK_START, MARK_END = "\x02", "\x03"
+SNIPPET_TOKENS = 32
+
+SOURCES = {
+    "posts_post_fts": "posts_post",
+    "posts_comment_fts": "posts_comment",
+}
+
+TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO {fts} (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+    INSERT INTO {fts} ({fts}, rowid, text)
+    VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF text ON {table}
+BEGIN
+    INSERT INTO {fts} ({fts}, rowid, text)
+    VALUES ('delete', old.id, old.text);
+    INSERT INTO {fts} (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+MATCHES = f"""
+    SELECT rowid AS post_id, bm25(posts_post_fts) AS score
+    FROM posts_post_fts WHERE posts_post_fts MATCH %s
+    UNION ALL
+    SELECT comment.post_id, bm25(posts_comment_fts) * {COMMENT_WEIGHT}
+    FROM posts_comment_fts
+    JOIN posts_comment AS comment ON comment.id = posts_comment_fts.rowid
+    WHERE posts_comment_fts MATCH %s
+"""
+
+
+def _statements(sql):
+    # Триггер содержит «;» внутри BEGIN … END, поэтому делим по END;
+    parts = [part.strip() for part in sql.split("END;")]
+    return [part + " END;" for part in parts if part]
+
+
+def install(using_connection=connection, rebuild=False):
+    """Создаёт индекс и триггеры, если их нет.
+
+    Пересоздание таблицы при миграции в SQLite удаляет её триггеры;
+    отсутствующий триггер означает, что индекс мог отстать, и тогда он
+    перестраивается из исходной таблицы.
+    """
+    if using_connection.vendor != "sqlite":
+        return
+    with using_connection.cursor() as cursor:
+        for fts, table in SOURCES.items():
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'"
+                " AND name LIKE %s",
+                [f"{fts}_%"]
+            )
+            complete = cursor.fetchone()[0] == 3
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"text, content='{table}', content_rowid='id',"
+                " tokenize='unicode61 remove_diacritics 2')"
+            )
+            for statement in _statements(TRIGGERS.format(fts=fts,
+                                                         table=table)):
+                cursor.execute(statement)
+            if rebuild or not complete:
+                cursor.execute(
+                    f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"
+                )
+
+
+def drop_triggers(using_connection=connection):
+    """Отключает синхронизацию индекса, например на время массовой
+    загрузки; вернуть её и перестроить индекс — ``install(rebuild=True)``.
+    """
+    if using_connection.vendor != "sqlite":
+        return
+    with using_connection.cursor() as cursor:
+        for fts in SOURCES:
+            for action in ("insert", "delete", "update"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {fts}_{action}")
+
+
+def uninstall(using_connection=connection):
+    drop_triggers(using_connection)
+    with using_connection.cursor() as cursor:
+        for fts in SOURCES:
+            cursor.execute(f"DROP TABLE IF EXISTS {fts}")
+
+
+def match_expression(query):
+    """Строка запроса пользователя в выражение FTS5: каждое слово ищется
+    как есть, последнее — ещё и как начало слова."""
+    words = re.findall(r"\w+", query or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def filter_matching(queryset, expression):
+    """Оставляет записи, в тексте или комментариях которых есть
+    совпадение. RawSQL в ``pk__in`` попал бы в двойные скобки, и SQLite
+    сравнивал бы только с первой строкой подзапроса."""
+    return queryset.extra(
+        where=[f"posts_post.id IN (SELECT post_id FROM ({MATCHES}))"],
+        params=[expression, expression],
+    )
+
+
+def encode_cursor(score, pk):
+    raw = f"{score!r}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+        return float(score), int(pk)
+    except (ValueError, UnicodeError, binascii.Error):
+        return None
+
+
+def _ranked(expression, limit, after):
+    sql = (
+        f"SELECT post_id, MIN(score) AS best FROM ({MATCHES})"
+        " GROUP BY post_id"
+    )
+    params = [expression, expression]
+    if after:
+        sql += " HAVING best > %s OR (best = %s AND post_id < %s)"
+        params += [after[0], after[0], after[1]]
+    sql += " ORDER BY best, post_id DESC LIMIT %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+def _mark(text):
+    html = escape(text)
+    html = html.replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+    return mark_safe(html)
+
+
+def _snippets(fts, expression, ids):
+    """Лучший фрагмент с выделенными словами для каждой записи."""
+    if not ids:
+        return {}
+    comments = fts == "posts_comment_fts"
+    column = "comment.post_id" if comments else f"{fts}.rowid"
+    join = (
+        f" JOIN posts_comment AS comment ON comment.id = {fts}.rowid"
+        if comments else ""
+    )
+    marks = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {column}, snippet({fts}, 0, %s, %s, '…', %s)"
+            f" FROM {fts}{join}"
+            f" WHERE {fts} MATCH %s AND {column} IN ({marks})"
+            f" ORDER BY bm25({fts})",
+            [MARK_START, MARK_END, SNIPPET_TOKENS, expression, *ids]
+        )
+        snippets = {}
+        for post_id, snippet in cursor.fetchall():
+            snippets.setdefault(post_id, snippet)
+    return snippets
+
+
+def search(queryset, query, per_page, after=None):
+    """Страница результатов поиска, лучшие совпадения первыми.
+
+    У записей страницы заполнены ``highlight`` (фрагмент текста записи
+    или комментария с выделенными словами) и ``matched_comment``.
+    Как и у ленты, возвращается обычный ``Page`` с ``next_cursor``.
+    """
+    expression = match_expression(query)
+    rows = []
+    if expression:
+        rows = _ranked(expression, per_page + 1, decode_cursor(after))
+    page_rows = rows[:per_page]
+    ids = [post_id for post_id, _ in page_rows]
+    posts = queryset.in_bulk(ids)
+    items = [posts[pk] for pk in ids if pk in posts]
+    if items:
+        in_posts = _snippets("posts_post_fts", expression, ids)
+        in_comments = _snippets(
+            "posts_comment_fts", expression,
+            [pk for pk in ids if pk not in in_posts]
+        )
+        for post in items:
+            post.matched_comment = post.pk not in in_posts
+            post.highlight = _mark(
+                in_posts.get(post.pk) or in_comments.get(post.pk, "")
+            )
+    page = Paginator(items, per_page).page(1)
+    page.previous_cursor = None
+    page.next_cursor = None
+    if len(rows) > per_page:
+        page.next_cursor = encode_cursor(*reversed(page_rows[-1]))
+    return page
@@ -0,0 +1,115 @@
+from functools import partial
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (counters, generations, suggestions, thumbnails, timeline,
+               trending)
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def bump_pages(author_id, *group_ids):
+    generations.bump(
+        generations.page_key("index"),
+        generations.page_key("profile", author_id),
+        *(generations.page_key("group", pk) for pk in group_ids if pk)
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+        generations.bump(generations.page_key("profile", instance.pk))
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    instance._saved_group_id = instance._saved_image = None
+    if instance.pk and not raw:
+        instance._saved_group_id, instance._saved_image = Post.objects.filter(
+            pk=instance.pk
+        ).values_list("group_id", "image").first() or (None, None)
+
+
+def renditions_ready(post_id, author_id, group_id):
+    generations.bump(generations.key("post", post_id))
+    bump_pages(author_id, group_id)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        timeline.fan_out(instance)
+        counters.bump_user(instance.author_id, posts_count=1)
+    if instance.image and instance.image.name != instance._saved_image:
+        thumbnails.schedule(instance.image.name, partial(
+            renditions_ready,
+            instance.pk, instance.author_id, instance.group_id
+        ))
+    generations.bump(generations.key("post", instance.pk))
+    bump_pages(
+        instance.author_id, instance.group_id, instance._saved_group_id
+    )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, posts_count=-1)
+    bump_pages(instance.author_id, instance.group_id)
+
+
+def comments_changed(comment):
+    generations.bump(generations.key("post", comment.post_id))
+    post = Post.objects.filter(pk=comment.post_id).values(
+        "author_id", "group_id"
+    ).first()
+    if post:
+        bump_pages(post["author_id"], post["group_id"])
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.bump_comments(instance.post_id, 1)
+        trending.record_comment(instance.post_id)
+    comments_changed(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+    comments_changed(instance)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    generations.bump(
+        generations.key("group", instance.pk),
+        generations.page_key("group", instance.pk),
+    )
+    if not created:
+        generations.bump(generations.page_key("groups"))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user_id, instance.author_id)
+        counters.bump_user(instance.user_id, following_count=1)
+        counters.bump_user(instance.author_id, followers_count=1)
+        suggestions.follows_changed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+    counters.bump_user(instance.user_id, following_count=-1)
+    counters.bump_user(instance.author_id, followers_count=-1)
+    suggestions.follows_changed(instance.user_id, instance.author_id)
@@ -0,0 +1,132 @@
+"""Рекомендации «кого читать» по графу подписок.
+
+Кандидаты для пользователя — авторы, на которых подписаны его
+собственные подписки (друзья друзей). Вес кандидата — число таких
+подписок, умноженное на множитель его активности за ACTIVITY_DAYS дней.
+Граф обходится пачками пользователей: в памяти держатся только рёбра
+одной пачки и счётчики её кандидатов, а сохраняются лишь
+SUGGESTIONS_PER_USER лучших кандидатов на пользователя.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import generations
+from .models import Follow, Post, Suggestion, UserStats
+
+CHUNK_SIZE = 500
+SUGGESTIONS_PER_USER = 10
+ACTIVITY_DAYS = 30
+SHOWN = 5
+
+
+def key(user_id):
+    return generations.key("suggestions", user_id)
+
+
+def for_user(user_id, count=SHOWN):
+    return list(
+        Suggestion.objects.filter(user_id=user_id)
+        .select_related("author")[:count]
+    )
+
+
+def follows_changed(user_id, author_id):
+    """Помечает рекомендации пользователя к пересчёту и сразу убирает
+    из них автора, на которого он подписался."""
+    UserStats.objects.filter(user_id=user_id).update(suggestions_stale=True)
+    removed, _ = Suggestion.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+    if removed:
+        generations.bump(key(user_id))
+
+
+def activity():
+    """Число записей каждого автора за последние ACTIVITY_DAYS дней."""
+    since = timezone.now() - timedelta(days=ACTIVITY_DAYS)
+    return dict(
+        Post.objects.filter(pub_date__gte=since).order_by()
+        .values_list("author").annotate(total=Count("pk"))
+    )
+
+
+def _following(user_ids):
+    following = defaultdict(set)
+    rows = Follow.objects.filter(user_id__in=user_ids).values_list(
+        "user_id", "author_id"
+    )
+    for user_id, author_id in rows.iterator():
+        following[user_id].add(author_id)
+    return following
+
+
+def compute(user_ids, scores, limit=SUGGESTIONS_PER_USER,
+            chunk_size=CHUNK_SIZE):
+    """Лучшие кандидаты пачки пользователей: id → [(вес, id автора)]."""
+    following = _following(user_ids)
+    readers = defaultdict(list)
+    for user_id, authors in following.items():
+        for author_id in authors:
+            readers[author_id].append(user_id)
+    overlap = defaultdict(Counter)
+    followees = sorted(readers)
+    for start in range(0, len(followees), chunk_size):
+        rows = Follow.objects.filter(
+            user_id__in=followees[start:start + chunk_size]
+        ).values_list("user_id", "author_id")
+        for followee, candidate in rows.iterator():
+            for user_id in readers[followee]:
+                if candidate != user_id and (
+                    candidate not in following[user_id]
+                ):
+                    overlap[user_id][candidate] += 1
+    return {
+        user_id: heapq.nlargest(limit, (
+            (count * (1 + math.log1p(scores.get(candidate, 0))), candidate)
+            for candidate, count in counts.items()
+        ))
+        for user_id, counts in overlap.items()
+    }
+
+
+def refresh(user_ids, scores, limit=SUGGESTIONS_PER_USER):
+    # Флаг снимается до чтения подписок: подписка, сделанная во время
+    # расчёта, снова пометит пользователя.
+    UserStats.objects.filter(user_id__in=user_ids).update(
+        suggestions_stale=False
+    )
+    results = compute(user_ids, scores, limit)
+    with transaction.atomic():
+        Suggestion.objects.filter(user_id__in=user_ids).delete()
+        Suggestion.objects.bulk_create([
+            Suggestion(user_id=user_id, author_id=author_id, score=score)
+            for user_id, top in results.items()
+            for score, author_id in top
+        ])
+    generations.bump(*(key(user_id) for user_id in user_ids))
+
+
+def run(full=False, chunk_size=CHUNK_SIZE, limit=SUGGESTIONS_PER_USER):
+    """Пересчитывает рекомендации всех пользователей (``full``) или
+    только тех, чьи подписки изменились. Возвращает число
+    пользователей."""
+    users = UserStats.objects.order_by("user_id").values_list(
+        "user_id", flat=True
+    )
+    if not full:
+        users = users.filter(suggestions_stale=True)
+    scores = activity()
+    total = last = 0
+    while True:
+        batch = list(users.filter(user_id__gt=last)[:chunk_size])
+        if not batch:
+            return total
+        refresh(batch, scores, limit)
+        total += len(batch)
+        last = batch[-1]
@@ -0,0 +1,31 @@
+from django import template
+
+from posts import cards
+from posts.thumbnails import renditions
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    return cards.render_cards(
+        posts, context.get("user"), context.get("author")
+    )
+
+
+@register.simple_tag(takes_context=True)
+def render_post_list(context, posts, separator=""):
+    return cards.render_post_list(
+        posts, context.get("user"), context.get("author"), separator
+    )
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    return post_cards(context, [post])[0]
+
+
+@register.inclusion_tag("includes/post_image.html")
+def post_image(post):
+    image = post.image.name if post.image else ""
+    return {"image": post.image, "renditions": renditions(image)}
@@ -0,0 +1,30 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from posts import benchmarks
+
+
+class CompareTest(SimpleTestCase):
+    def test_only_slowdowns_beyond_threshold_are_flagged(self):
+        slower = benchmarks.compare(
+            {"a": 1.3, "b": 1.1, "c": 0.5, "new": 9.0},
+            {"a": 1.0, "b": 1.0, "c": 1.0},
+            threshold=0.15,
+        )
+        self.assertEqual(set(slower), {"a"})
+
+
+class BenchmarksTest(TestCase):
+    def test_every_benchmark_runs_on_seeded_data(self):
+        call_command(
+            "seed_loadtest", "--users", "20", "--posts", "50",
+            "--comments", "20", "--images", "0", stdout=StringIO(),
+        )
+        data = benchmarks.Dataset()
+        for name, setup in benchmarks.BENCHMARKS.items():
+            with self.subTest(name):
+                self.assertGreater(
+                    benchmarks.measure(setup(data), min_time=0, repeat=1), 0
+                )
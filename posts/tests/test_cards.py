@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts.cards import render_cards, render_post_list
+from posts.models import Comment, Group, Post, User
+
+
+class PostCardCacheTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="writer")
+        self.reader = User.objects.create_user(username="reader")
+        self.group = Group.objects.create(
+            title="Старое название", slug="group", description="Описание"
+        )
+        self.post = Post.objects.create(
+            text="Текст записи", author=self.author, group=self.group
+        )
+
+    def render(self, user=None, author=None):
+        post = Post.objects.select_related("author", "group").get(
+            pk=self.post.pk
+        )
+        return render_cards([post], user, author)[0]
+
+    def test_card_is_served_from_cache(self):
+        first = self.render()
+        Post.objects.filter(pk=self.post.pk).update(text="Тайная правка")
+        self.assertEqual(self.render(), first)
+
+    def test_edit_comment_and_group_rename_invalidate_card(self):
+        self.render()
+        self.post.text = "Новый текст"
+        self.post.save()
+        self.assertIn("Новый текст", self.render())
+        Comment.objects.create(post=self.post, author=self.reader, text="Да")
+        self.assertIn("Комментариев: 1", self.render())
+        self.group.title = "Новое название"
+        self.group.save()
+        self.assertIn("Новое название", self.render())
+
+    def test_card_of_row_read_before_edit_is_not_cached(self):
+        stale = Post.objects.select_related("author", "group").get(
+            pk=self.post.pk
+        )
+        self.post.text = "Новый текст"
+        self.post.save()
+        self.assertIn("Текст записи", render_cards([stale], None)[0])
+        self.assertIn("Новый текст", self.render())
+
+    def test_viewer_overlay_is_not_cached(self):
+        self.render()
+        self.assertNotIn("Редактировать", self.render(self.reader))
+        self.assertIn("Добавить комментарий", self.render(self.reader))
+        self.assertIn(
+            "Редактировать", self.render(self.author, author=self.author)
+        )
+        client = Client()
+        response = client.get(reverse("index"))
+        self.assertNotContains(response, "Добавить комментарий")
+
+    def test_action_links_match_reverse(self):
+        other = Post.objects.create(
+            text="Другая", author=User.objects.create_user(username="a.b+c@d")
+        )
+        posts = list(
+            Post.objects.select_related("author", "group").order_by("pk")
+        )
+        html = render_post_list(posts, self.author, self.author, "<hr>")
+        for post in (self.post, other):
+            self.assertIn(
+                reverse("post", args=[post.author.username, post.pk]), html
+            )
+            self.assertIn(
+                reverse("post_edit", args=[post.author.username, post.pk]),
+                html
+            )
+        self.assertEqual(
+            html, "<hr>".join(render_cards(posts, self.author, self.author))
+        )
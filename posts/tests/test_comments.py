@@ -0,0 +1,94 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+from posts.paginator import newer_than
+from posts.views import COMMENTS_PER_PAGE
+
+
+class CommentPagesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author")
+        self.post = Post.objects.create(text="Запись", author=self.author)
+        self.url = reverse("post", args=["author", self.post.pk])
+
+    def add_comments(self, count):
+        users = [
+            User.objects.create_user(username=f"reader{i}")
+            for i in range(User.objects.count(), User.objects.count() + 3)
+        ]
+        for i in range(count):
+            Comment.objects.create(
+                post=self.post, author=users[i % 3], text=f"Комментарий {i}"
+            )
+
+    def queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = Client().get(url)
+        return response, len(context)
+
+    def test_post_page_shows_first_comments_and_load_more(self):
+        self.add_comments(COMMENTS_PER_PAGE + 5)
+        response = Client().get(self.url)
+        self.assertContains(response, "Комментарий 0")
+        self.assertContains(response, 'name="comment_',
+                            count=COMMENTS_PER_PAGE)
+        self.assertNotContains(response, f"Комментарий {COMMENTS_PER_PAGE}<")
+        cursor = response.context["more_comments"]
+        self.assertIsNotNone(cursor)
+
+        more = Client().get(
+            reverse("post_comments", args=["author", self.post.pk]),
+            {"after": cursor},
+        )
+        self.assertEqual(
+            [comment.text for comment in more.context["comments"]],
+            [f"Комментарий {i}" for i in range(COMMENTS_PER_PAGE,
+                                               COMMENTS_PER_PAGE + 5)]
+        )
+        self.assertIsNone(more.context["more_comments"])
+        self.assertNotContains(more, "Показать ещё")
+
+    def test_post_page_cost_does_not_grow_with_comments(self):
+        self.add_comments(5)
+        _, few = self.queries(self.url)
+        self.add_comments(COMMENTS_PER_PAGE * 3)
+        response, many = self.queries(self.url)
+        self.assertEqual(few, many)
+        self.assertContains(response, "Показать ещё")
+
+    def test_drifted_counter_does_not_break_post_page(self):
+        Post.objects.filter(pk=self.post.pk).update(
+            comment_count=COMMENTS_PER_PAGE * 2
+        )
+        response = Client().get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["more_comments"])
+        self.add_comments(COMMENTS_PER_PAGE)
+        Post.objects.filter(pk=self.post.pk).update(comment_count=0)
+        response = Client().get(self.url)
+        self.assertIsNone(response.context["more_comments"])
+        self.add_comments(1)
+        response = Client().get(self.url)
+        self.assertIsNotNone(response.context["more_comments"])
+
+    def test_next_comments_search_index_by_range(self):
+        self.add_comments(COMMENTS_PER_PAGE + 5)
+        comments = self.post.comments.order_by("created", "pk")
+        last = comments[COMMENTS_PER_PAGE - 1]
+        sql, params = comments.filter(
+            newer_than("created", last.created, last.pk)
+        )[:COMMENTS_PER_PAGE + 1].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " | ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn(
+            "USING INDEX posts_comment_post_created (post_id=? AND created>?)",
+            plan
+        )
+        self.assertNotIn("TEMP B-TREE", plan)
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="writer")
+        self.reader = User.objects.create_user(username="reader")
+        self.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        self.post = Post.objects.create(
+            text="Запись", author=self.author, group=self.group
+        )
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.urls = {
+            "post": reverse("post", args=[self.author.username,
+                                          self.post.pk]),
+            "profile": reverse("profile", args=[self.author.username]),
+            "group_posts": reverse("group_posts", args=[self.group.slug]),
+        }
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_return_304(self):
+        for name, url in self.urls.items():
+            with self.subTest(name):
+                response = self.client.get(url)
+                self.assertIn("private", response["Cache-Control"])
+                cached = self.revalidate(url, response["ETag"])
+                self.assertEqual(cached.status_code, 304)
+                self.assertEqual(cached["ETag"], response["ETag"])
+
+    def test_changes_produce_new_etag(self):
+        etags = {
+            name: self.client.get(url)["ETag"]
+            for name, url in self.urls.items()
+        }
+        Comment.objects.create(post=self.post, author=self.reader, text="!")
+        Follow.objects.create(user=self.reader, author=self.author)
+        for name, url in self.urls.items():
+            with self.subTest(name):
+                self.assertEqual(
+                    self.revalidate(url, etags[name]).status_code, 200
+                )
+
+    def test_etag_depends_on_viewer(self):
+        url = self.urls["post"]
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(Client().get(url, HTTP_IF_NONE_MATCH=etag)
+                         .status_code, 200)
@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, User, UserStats
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader")
+        self.author = User.objects.create_user(username="writer")
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.post = Post.objects.create(text="Запись", author=self.author)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_comment_count_follows_comments(self):
+        self.client.post(reverse("add_comment", kwargs={
+            "username": self.author.username,
+            "post_id": self.post.id
+        }), {"text": "Комментарий"})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        Comment.objects.filter(post=self.post).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_follow_counters(self):
+        url_kwargs = {"username": self.author.username}
+        self.client.get(reverse("profile_follow", kwargs=url_kwargs))
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.client.get(reverse("profile_unfollow", kwargs=url_kwargs))
+        self.assertEqual(self.stats(self.user).following_count, 0)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+
+    def test_posts_count(self):
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_delete_with_drifted_counter_at_zero(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text="Текст"
+        )
+        Post.objects.update(comment_count=0)
+        UserStats.objects.update(posts_count=0)
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_reconcile_repairs_drift(self):
+        Comment.objects.create(post=self.post, author=self.user, text="Текст")
+        Post.objects.update(comment_count=7)
+        UserStats.objects.update(posts_count=5, followers_count=3)
+        call_command("reconcile_counters", batch_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.user).posts_count, 0)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+
+    def test_profile_uses_stored_counters(self):
+        UserStats.objects.filter(user=self.author).update(posts_count=42)
+        response = self.client.get(reverse("profile", kwargs={
+            "username": self.author.username
+        }))
+        self.assertContains(response, "Записей: 42")
@@ -0,0 +1,109 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import search
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="writer")
+        cls.reader = User.objects.create_user(username="reader")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.old = Post.objects.create(
+            text="Старая запись", author=cls.author, group=cls.group
+        )
+        cls.new = Post.objects.create(text="Новая запись", author=cls.author)
+        Comment.objects.create(post=cls.old, author=cls.reader, text="Ок")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def export(self, *args):
+        handle, path = tempfile.mkstemp(suffix=".jsonl.gz")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        out = StringIO()
+        call_command("export_posts", path, *args, stdout=out)
+        with gzip.open(path, "rt", encoding="utf-8") as dump:
+            return [json.loads(line) for line in dump], out.getvalue()
+
+    def test_exports_every_kind_with_natural_keys(self):
+        records, out = self.export("--chunk-size", "1")
+        self.assertEqual(
+            [record["type"] for record in records],
+            ["post", "post", "comment", "follow"]
+        )
+        self.assertEqual(records[0]["author"], "writer")
+        self.assertEqual(records[0]["group"], "group")
+        self.assertEqual(records[2]["post"], self.old.pk)
+        self.assertEqual(
+            records[3],
+            {"type": "follow", "user": "reader", "author": "writer"}
+        )
+        self.assertIn("post: 2, comment: 1, follow: 1", out)
+
+    def test_since_exports_only_newer_rows(self):
+        since = self.old.pub_date.isoformat()
+        records, _ = self.export("--since", since)
+        posts = [r["id"] for r in records if r["type"] == "post"]
+        self.assertEqual(posts, [self.new.pk])
+
+
+class ImportPostsTest(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username="writer")
+        reader = User.objects.create_user(username="reader")
+        group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        self.post = Post.objects.create(
+            text="Переносимая запись", author=author, group=group
+        )
+        Comment.objects.create(post=self.post, author=reader, text="Ок")
+        Follow.objects.create(user=reader, author=author)
+        handle, self.path = tempfile.mkstemp(suffix=".jsonl.gz")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        call_command("export_posts", self.path, stdout=StringIO())
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        User.objects.filter(username="reader").delete()
+
+    def test_import_restores_rows_and_derived_data(self):
+        call_command(
+            "import_posts", self.path, "--batch-size", "2", stdout=StringIO()
+        )
+        post = Post.objects.get()
+        self.assertEqual(post.text, "Переносимая запись")
+        self.assertEqual(post.pub_date, self.post.pub_date)
+        self.assertEqual(post.group.slug, "group")
+        self.assertEqual(post.comment_count, 1)
+        reader = User.objects.get(username="reader")
+        self.assertFalse(reader.has_usable_password())
+        self.assertEqual(reader.stats.following_count, 1)
+        self.assertEqual(post.author.stats.posts_count, 1)
+        self.assertTrue(reader.timeline.filter(post=post).exists())
+        found = search.search(Post.objects.all(), "переносимая", 10)
+        self.assertEqual(list(found), [post])
+
+    def test_comments_without_post_are_reported(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as dump:
+            records = [json.loads(line) for line in dump]
+        with gzip.open(self.path, "wt", encoding="utf-8") as dump:
+            for record in records:
+                if record["type"] != "post":
+                    dump.write(json.dumps(record) + "\n")
+        errors = StringIO()
+        call_command("import_posts", self.path, stdout=StringIO(),
+                     stderr=errors)
+        self.assertFalse(Comment.objects.exists())
+        self.assertIn(str(self.post.pk), errors.getvalue())
+        self.assertIn("Пропущены комментарии", errors.getvalue())
@@ -0,0 +1,53 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from posts import loadtest
+from posts.models import Follow, Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class SummaryTest(SimpleTestCase):
+    def test_percentiles_use_nearest_rank(self):
+        values = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(loadtest.percentile(values, 50), 0.05)
+        self.assertEqual(loadtest.percentile(values, 99), 0.099)
+        self.assertEqual(loadtest.percentile(values[:1], 95), 0.001)
+
+    def test_summary_counts_errors_per_endpoint(self):
+        samples = [("index", 0.01, 200), ("index", 0.03, 500),
+                   ("post", 0.02, 302)]
+        summary = loadtest.summarize(samples, elapsed=2)
+        self.assertEqual(summary["rps"], 1.5)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(summary["endpoints"]["index"]["p99_ms"], 30)
+        self.assertEqual(summary["endpoints"]["post"]["errors"], 0)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SeedLoadtestTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_seed_builds_skewed_dataset(self):
+        call_command(
+            "seed_loadtest", "--users", "50", "--posts", "200",
+            "--comments", "100", "--images", "1", "--image-share", "1",
+            stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertFalse(Post.objects.filter(image="").exists())
+        top = User.objects.order_by("id").first()
+        last = User.objects.order_by("id").last()
+        self.assertGreater(
+            Follow.objects.filter(author=top).count(),
+            Follow.objects.filter(author=last).count(),
+        )
+        self.assertEqual(top.stats.posts_count, top.posts.count())
+        self.assertTrue(top.check_password("loadtest"))
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.test import Client, TestCase, override_settings
+
+from yatube import metrics
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        settings = override_settings(METRICS_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        metrics.registry = metrics.Registry()
+
+    def scrape(self):
+        response = Client().get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_request_metrics_are_exposed(self):
+        Client().get("/")
+        text = self.scrape()
+        self.assertIn(
+            'yatube_http_requests_total{method="GET",status="200",'
+            'view="index"} 1', text
+        )
+        self.assertIn(
+            'yatube_http_request_duration_seconds_count{view="index"} 1',
+            text
+        )
+        self.assertIn('yatube_template_renders_total{template="index.html"}',
+                      text)
+        self.assertRegex(
+            text, r'yatube_db_queries_total\{view="index"\} [1-9]'
+        )
+        self.assertIn('yatube_cache_lookups_total{result="miss",'
+                      'view="index"}', text)
+
+    def test_snapshots_of_all_processes_are_summed(self):
+        Client().get("/")
+        other = metrics.Registry()
+        other.inc("yatube_http_requests_total",
+                  {"view": "index", "method": "GET", "status": 200}, 4)
+        with open(os.path.join(self.directory, "other.json"), "w") as file:
+            json.dump(other.snapshot(), file)
+        self.assertIn(
+            'yatube_http_requests_total{method="GET",status="200",'
+            'view="index"} 5', self.scrape()
+        )
+
+    def test_snapshots_of_finished_processes_are_retired(self):
+        process = subprocess.Popen([sys.executable, "-c", ""])
+        process.wait()
+        other = metrics.Registry()
+        other.inc("yatube_rate_limited_total",
+                  {"view": "new_post", "scope": "ip"}, 3)
+        path = os.path.join(self.directory, f"{process.pid}-0000.json")
+        with open(path, "w") as file:
+            json.dump(other.snapshot(), file)
+        expected = (
+            'yatube_rate_limited_total{scope="ip",view="new_post"} 3'
+        )
+        self.assertIn(expected, self.scrape())
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, metrics.RETIRED)
+        ))
+        self.assertIn(expected, self.scrape())
+
+    def test_metrics_are_hidden_from_other_addresses(self):
+        response = Client(REMOTE_ADDR="10.1.2.3").get("/metrics")
+        self.assertEqual(response.status_code, 404)
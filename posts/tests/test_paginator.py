@@ -0,0 +1,111 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.paginator import CursorPaginator, decode_cursor, encode_cursor
+from posts.views import POSTS_PER_PAGE
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser")
+        cls.posts = [
+            Post.objects.create(text=f"Запись {i}", author=cls.user)
+            for i in range(POSTS_PER_PAGE * 2 + 3)
+        ]
+        cls.newest_first = cls.posts[::-1]
+
+    def setUp(self):
+        cache.clear()
+        self.paginator = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+
+    def test_cursor_round_trip(self):
+        post = self.posts[0]
+        self.assertEqual(
+            decode_cursor(encode_cursor(post.pub_date, post.pk)),
+            (post.pub_date, post.pk)
+        )
+        self.assertIsNone(decode_cursor("не-курсор"))
+
+    def test_walk_forward_and_back(self):
+        first = self.paginator.get_page()
+        self.assertEqual(list(first), self.newest_first[:POSTS_PER_PAGE])
+        self.assertIsNone(first.previous_cursor)
+        second = self.paginator.get_page(before=first.next_cursor)
+        self.assertEqual(
+            list(second),
+            self.newest_first[POSTS_PER_PAGE:POSTS_PER_PAGE * 2]
+        )
+        last = self.paginator.get_page(before=second.next_cursor)
+        self.assertEqual(list(last), self.newest_first[POSTS_PER_PAGE * 2:])
+        self.assertIsNone(last.next_cursor)
+        back = self.paginator.get_page(after=last.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertEqual(
+            list(self.paginator.get_page(after=back.previous_cursor)),
+            list(first)
+        )
+
+    def test_invalid_cursor_shows_first_page(self):
+        page = self.paginator.get_page(before="мусор")
+        self.assertEqual(list(page), self.newest_first[:POSTS_PER_PAGE])
+
+    def test_views_follow_cursor_links(self):
+        client = Client()
+        response = client.get(reverse("index"))
+        next_cursor = response.context["page"].next_cursor
+        self.assertContains(response, f"?before={next_cursor}")
+        response = client.get(reverse("profile", kwargs={
+            "username": self.user.username
+        }), {"before": next_cursor})
+        self.assertEqual(
+            list(response.context["page"]),
+            self.newest_first[POSTS_PER_PAGE:POSTS_PER_PAGE * 2]
+        )
+
+
+class CursorQueryPlanTest(TestCase):
+    """Страница по курсору ищет по индексу диапазоном, а не просматривает
+    и не сортирует всё, что старше курсора."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser")
+        for i in range(POSTS_PER_PAGE * 3):
+            Post.objects.create(text=f"Запись {i}", author=cls.user)
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return " | ".join(row[-1] for row in cursor.fetchall())
+
+    def test_cursor_pages_search_index_by_range(self):
+        posts = Post.objects.select_related("author", "group")
+        middle = Post.objects.order_by("-pub_date", "-pk")[POSTS_PER_PAGE]
+        cursor = (middle.pub_date, middle.pk)
+        feeds = {
+            "posts_post_date_id": posts,
+            "posts_post_author_date": posts.filter(author=self.user),
+        }
+        for index, feed in feeds.items():
+            paginator = CursorPaginator(feed, POSTS_PER_PAGE)
+            queries = {
+                "pub_date<?": feed.filter(paginator._older(*cursor))
+                .order_by("-pub_date", "-pk")[:POSTS_PER_PAGE + 1],
+                "pub_date>?": feed.filter(paginator._newer(*cursor))
+                .order_by("pub_date", "pk")[:POSTS_PER_PAGE + 1],
+            }
+            for bound, queryset in queries.items():
+                with self.subTest(index=index, bound=bound):
+                    plan = self.plan(queryset)
+                    self.assertRegex(
+                        plan, rf"SEARCH posts_post USING INDEX {index} "
+                              rf"\([^)]*{re.escape(bound)}\)"
+                    )
+                    self.assertNotIn("TEMP B-TREE", plan)
@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+# Сессия и пользователь авторизованного клиента стоят ещё 2 запроса.
+QUERY_BUDGETS = {
+    "index": 3,
+    "group_posts": 4,
+    "profile": 6,
+    "post": 4,
+    "follow_index": 4,
+    "post_edit": 4,
+}
+
+
+class QueryBudgetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader")
+        self.author = User.objects.create_user(username="writer")
+        self.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        Follow.objects.create(user=self.user, author=self.author)
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.user)
+        self.post = self.add_posts(1)[0]
+
+    def add_posts(self, count):
+        posts = []
+        for i in range(count):
+            post = Post.objects.create(
+                text=f"Запись {i}", author=self.author, group=self.group
+            )
+            Comment.objects.create(post=post, author=self.user, text="Да")
+            posts.append(post)
+        return posts
+
+    def urls(self):
+        post_kwargs = {
+            "username": self.author.username,
+            "post_id": self.post.id,
+        }
+        return {
+            "index": reverse("index"),
+            "group_posts": reverse("group_posts", args=[self.group.slug]),
+            "profile": reverse("profile", args=[self.author.username]),
+            "post": reverse("post", kwargs=post_kwargs),
+            "follow_index": reverse("follow_index"),
+            "post_edit": reverse("post_edit", kwargs=post_kwargs),
+        }
+
+    def count_queries(self, url):
+        cache.clear()
+        client = self.client
+        if url == reverse("follow_index"):
+            client = self.reader_client
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_depend_on_posts_number(self):
+        small = {
+            name: self.count_queries(url) for name, url in self.urls().items()
+        }
+        self.add_posts(15)
+        for name, url in self.urls().items():
+            with self.subTest(url=name):
+                queries = self.count_queries(url)
+                self.assertLessEqual(queries, QUERY_BUDGETS[name])
+                self.assertEqual(queries, small[name])
+
+    def test_query_count_does_not_depend_on_comments_number(self):
+        small = {
+            name: self.count_queries(url) for name, url in self.urls().items()
+        }
+        commenters = [
+            User.objects.create_user(username=f"commenter{i}")
+            for i in range(5)
+        ]
+        for i in range(15):
+            Comment.objects.create(
+                post=self.post, author=commenters[i % len(commenters)],
+                text=f"Комментарий {i}"
+            )
+        for name, url in self.urls().items():
+            with self.subTest(url=name):
+                queries = self.count_queries(url)
+                self.assertLessEqual(queries, QUERY_BUDGETS[name])
+                self.assertEqual(queries, small[name])
+
+    def test_cached_feed_page_skips_feed_query(self):
+        urls = self.urls()
+        for name in ("index", "group_posts", "profile"):
+            with self.subTest(url=name):
+                self.client.get(urls[name])
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(urls[name])
+                self.assertContains(response, "Запись 0")
+                self.assertFalse([
+                    query for query in context.captured_queries
+                    if 'FROM "posts_post"' in query["sql"]
+                ])
@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube import metrics, ratelimit
+
+
+class TokenBucketTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def consume(self, now):
+        with mock.patch.object(ratelimit.time, "time", return_value=now):
+            return ratelimit._consume("ratelimit:test", 2, 60, 3)
+
+    def test_burst_then_steady_rate(self):
+        self.assertEqual([self.consume(1000) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(self.consume(1000), 30)
+        self.assertEqual(self.consume(1029), 1)
+        self.assertEqual(self.consume(1030), 0)
+        self.assertEqual(self.consume(1030), 30)
+
+    def test_idle_bucket_refills(self):
+        for _ in range(3):
+            self.consume(1000)
+        self.assertEqual([self.consume(2000) for _ in range(3)], [0, 0, 0])
+        self.assertNotEqual(self.consume(2000), 0)
+
+
+class RateLimitViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry = metrics.Registry()
+        self.user = User.objects.create_user(username="writer")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    @override_settings(RATE_LIMITS={"new_post": {"user": (2, 60, 2)}})
+    def test_new_post_is_limited_per_user(self):
+        url = reverse("new_post")
+        for _ in range(2):
+            self.assertEqual(
+                self.client.post(url, {"text": "Запись"}).status_code, 302
+            )
+        response = self.client.post(url, {"text": "Запись"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(metrics.registry.counters[
+            ("yatube_rate_limited_total",
+             (("scope", "user"), ("view", "new_post")))
+        ], 1)
+
+    @override_settings(RATE_LIMITS={"profile_follow": {"ip": (1, 60, 1)}})
+    def test_follow_is_limited_per_ip(self):
+        author = User.objects.create_user(username="author")
+        url = reverse("profile_follow", args=[author.username])
+        self.assertEqual(self.client.get(url).status_code, 302)
+        other = Client()
+        other.force_login(User.objects.create_user(username="other"))
+        self.assertEqual(other.get(url).status_code, 429)
+        self.assertEqual(
+            Client(REMOTE_ADDR="10.0.0.2").get(url).status_code, 302
+        )
+
+    @override_settings(RATE_LIMITS={
+        "new_post": {"ip": (3, 60, 3), "user": (1, 60, 1)},
+    })
+    def test_rejected_request_keeps_ip_tokens(self):
+        url = reverse("new_post")
+        for _ in range(3):
+            self.client.post(url, {"text": "Запись"})
+        other = Client()
+        other.force_login(User.objects.create_user(username="other"))
+        self.assertEqual(
+            other.post(url, {"text": "Запись"}).status_code, 302
+        )
+
+    @override_settings(RATE_LIMITS={"profile_follow": {"ip": (1, 60, 1)}},
+                       TRUSTED_PROXIES=["10.0.0.1"])
+    def test_clients_behind_proxy_have_own_buckets(self):
+        author = User.objects.create_user(username="author")
+        url = reverse("profile_follow", args=[author.username])
+        clients = []
+        for name, headers in (
+            ("first", {"HTTP_X_FORWARDED_FOR": "1.1.1.1",
+                       "REMOTE_ADDR": "10.0.0.1"}),
+            ("second", {"HTTP_X_FORWARDED_FOR": "6.6.6.6, 2.2.2.2",
+                        "REMOTE_ADDR": "10.0.0.1"}),
+            ("spoofed", {"HTTP_X_FORWARDED_FOR": "2.2.2.2",
+                         "REMOTE_ADDR": "3.3.3.3"}),
+        ):
+            client = Client(**headers)
+            client.force_login(User.objects.create_user(username=name))
+            clients.append(client)
+        first, second, spoofed = clients
+        self.assertEqual(first.get(url).status_code, 302)
+        self.assertEqual(first.get(url).status_code, 429)
+        self.assertEqual(second.get(url).status_code, 302)
+        self.assertEqual(spoofed.get(url).status_code, 302)
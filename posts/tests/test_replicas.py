@@ -0,0 +1,87 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+
+from posts import generations
+from posts.models import Group, Post, User
+from yatube import replicas
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], REPLICA_MAX_LAG=30)
+class ReplicaChoiceTest(SimpleTestCase):
+    def setUp(self):
+        cache.delete(replicas.synced_key("replica1"))
+        self.addCleanup(vars(replicas._local).clear)
+
+    def test_replica_is_used_while_recently_synced(self):
+        self.assertEqual(replicas.choose_replica(), ("default", None))
+        synced_at = time.time()
+        cache.set(replicas.synced_key("replica1"), synced_at)
+        self.assertEqual(replicas.choose_replica(), ("replica1", synced_at))
+        cache.set(replicas.synced_key("replica1"), synced_at - 60)
+        self.assertEqual(replicas.choose_replica(), ("default", None))
+
+    def test_lagging_replica_switches_to_primary(self):
+        generations.get_many([generations.key("post", 1)])
+        replicas._local.database = "replica1"
+        replicas._local.synced_at = time.time()
+        generations.get_many([generations.key("post", 1)])
+        self.assertEqual(replicas._local.database, "replica1")
+        self.assertFalse(replicas.lagged())
+        generations.bump(generations.key("post", 1))
+        generations.get_many([generations.key("post", 1)])
+        self.assertEqual(replicas._local.database, "default")
+        self.assertTrue(replicas.lagged())
+
+    def test_router_reads_from_request_database(self):
+        router = replicas.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Post))
+        replicas._local.database = "replica1"
+        self.addCleanup(setattr, replicas._local, "database", None)
+        self.assertEqual(router.db_for_read(Post), "replica1")
+        self.assertEqual(router.db_for_read(User), "replica1")
+        self.assertEqual(router.db_for_write(Post), "default")
+        self.assertFalse(router.allow_migrate("replica1", "posts"))
+        self.assertIsNone(router.allow_migrate("default", "posts"))
+        self.assertIsNone(router.allow_migrate("query_plans", "posts"))
+
+    def test_sync_copies_primary(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        primary = os.path.join(directory, "primary.sqlite3")
+        replica = os.path.join(directory, "replica.sqlite3")
+        with sqlite3.connect(primary) as db:
+            db.execute("CREATE TABLE t (x)")
+            db.execute("INSERT INTO t VALUES (1)")
+        databases = {
+            "default": {"NAME": primary}, "replica1": {"NAME": replica},
+        }
+        with override_settings(DATABASES=databases):
+            replicas.sync("replica1")
+        with sqlite3.connect(replica) as db:
+            self.assertEqual(db.execute("SELECT x FROM t").fetchall(), [(1,)])
+        self.assertEqual(replicas.choose_replica()[0], "replica1")
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class PinningTest(TestCase):
+    def test_writer_is_pinned_to_primary(self):
+        user = User.objects.create_user(username="writer")
+        client = Client()
+        client.force_login(user)
+        response = client.get("/")
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+        response = client.post("/new/", {"text": "Новая запись"})
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+        request = client.get("/").wsgi_request
+        self.assertTrue(replicas.ReplicaMiddleware(None).pinned(request))
+
+    def test_reading_does_not_pin(self):
+        Group.objects.create(title="Группа", slug="group")
+        response = Client().get("/group/group/")
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
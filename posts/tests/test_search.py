@@ -0,0 +1,71 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Post, User
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="writer")
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        cls.in_text = Post.objects.create(
+            text="Прогулка по <b>Невскому</b> проспекту", author=cls.author
+        )
+        cls.in_comment = Post.objects.create(
+            text="Фотографии с прогулки", author=cls.author
+        )
+        Comment.objects.create(
+            post=cls.in_comment, author=cls.author,
+            text="Это же Невский проспект!"
+        )
+        Post.objects.create(text="Совсем о другом", author=cls.author)
+
+    def find(self, query, per_page=10, after=None):
+        return search.search(Post.objects.all(), query, per_page, after)
+
+    def test_text_matches_rank_above_comment_matches(self):
+        page = self.find("проспект")
+        self.assertEqual(list(page), [self.in_text, self.in_comment])
+        self.assertFalse(page[0].matched_comment)
+        self.assertTrue(page[1].matched_comment)
+
+    def test_highlight_escapes_text(self):
+        post = self.find("невск")[0]
+        self.assertIn("&lt;b&gt;<mark>Невскому</mark>&lt;/b&gt;",
+                      post.highlight)
+
+    def test_index_follows_bulk_update_and_delete(self):
+        Post.objects.filter(pk=self.in_text.pk).update(text="Пусто")
+        Comment.objects.all().delete()
+        self.assertEqual(list(self.find("проспект")), [])
+        self.assertEqual(list(self.find("пусто")), [self.in_text])
+
+    def test_cursor_pagination(self):
+        first = self.find("проспект", per_page=1)
+        self.assertEqual(list(first), [self.in_text])
+        second = self.find("проспект", per_page=1, after=first.next_cursor)
+        self.assertEqual(list(second), [self.in_comment])
+        self.assertIsNone(second.next_cursor)
+
+    def test_search_page(self):
+        response = Client().get(reverse("search"), {"q": "проспект \""})
+        self.assertEqual(list(response.context["page"]),
+                         [self.in_text, self.in_comment])
+        self.assertContains(response, "<mark>")
+
+    def test_admin_search_uses_index(self):
+        client = Client()
+        client.force_login(self.admin)
+        url = reverse("admin:posts_post_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, {"q": "проспект"})
+        self.assertEqual(response.context["cl"].result_count, 2)
+        sql = " ".join(query["sql"] for query in queries)
+        self.assertIn("MATCH", sql)
+        self.assertNotIn("LIKE", sql)
@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from yatube.cache import SQLiteCache
+
+
+def _incr_many(cache, times):
+    for _ in range(times):
+        cache.incr("counter")
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(
+            os.path.join(self.directory, "cache.sqlite3"),
+            {"OPTIONS": options}
+        )
+
+    def test_set_get_delete(self):
+        self.cache.set("key", {"value": [1, 2]})
+        self.assertEqual(self.cache.get("key"), {"value": [1, 2]})
+        self.assertFalse(self.cache.add("key", "other"))
+        self.cache.delete("key")
+        self.assertIsNone(self.cache.get("key"))
+        self.assertTrue(self.cache.add("key", "other"))
+
+    def test_many_and_expiry(self):
+        self.cache.set_many({"a": 1, "b": "два"})
+        self.cache.set("short", 3, timeout=0.05)
+        time.sleep(0.1)
+        self.assertEqual(
+            self.cache.get_many(["a", "b", "short", "missing"]),
+            {"a": 1, "b": "два"}
+        )
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set("counter", 0)
+        workers = [
+            multiprocessing.Process(
+                target=_incr_many, args=(self.cache, 50)
+            )
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get("counter"), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+    def test_other_instances_share_data(self):
+        self.cache.set("shared", "value")
+        self.assertEqual(self.make_cache().get("shared"), "value")
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.make_cache(MAX_SIZE=10000, TOUCH_INTERVAL=0)
+        cache.set("hot", "x" * 1000)
+        for i in range(20):
+            cache.get("hot")
+            cache.set(f"cold:{i}", "x" * 1000)
+        self.assertIsNotNone(cache.get("hot"))
+        self.assertIsNone(cache.get("cold:0"))
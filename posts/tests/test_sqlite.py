@@ -0,0 +1,59 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from yatube.sqlite.base import DatabaseWrapper
+
+
+class SQLiteBackendTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.path = os.path.join(self.directory, "db.sqlite3")
+        self.wrapper = DatabaseWrapper({
+            **connection.settings_dict, "NAME": self.path,
+            "CONN_MAX_AGE": 600,
+            "OPTIONS": {"pragmas": {"busy_timeout": 1234}},
+        }, alias="sqlite_test")
+        self.addCleanup(self.wrapper.close)
+
+    def pragma(self, name):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_set_on_connect(self):
+        self.assertEqual(self.pragma("journal_mode"), "wal")
+        self.assertEqual(self.pragma("synchronous"), 1)
+        self.assertEqual(self.pragma("busy_timeout"), 1234)
+
+    def test_connection_is_kept_between_requests(self):
+        self.wrapper.ensure_connection()
+        first = self.wrapper.connection
+        self.wrapper.close_if_unusable_or_obsolete()
+        self.wrapper.ensure_connection()
+        self.assertIs(self.wrapper.connection, first)
+
+    def test_replaced_file_is_reopened(self):
+        self.wrapper.ensure_connection()
+        first = self.wrapper.connection
+        other = os.path.join(self.directory, "other.sqlite3")
+        sqlite3.connect(other).close()
+        os.replace(other, self.path)
+        self.wrapper.close_if_unusable_or_obsolete()
+        self.wrapper.ensure_connection()
+        self.assertIsNot(self.wrapper.connection, first)
+
+
+class MaintenanceCommandTest(TransactionTestCase):
+    def test_maintenance_runs(self):
+        output = StringIO()
+        call_command("sqlite_maintenance", "--vacuum", stdout=output)
+        self.assertIn("ANALYZE", output.getvalue())
+        self.assertIn("VACUUM", output.getvalue())
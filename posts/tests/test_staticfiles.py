@@ -0,0 +1,152 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from yatube.staticfiles import (CompressedManifestStaticFilesStorage,
+                                StaticFilesMiddleware)
+
+STYLE = "".join(f".rule-{i} {{ margin: {i}px; }}\n" for i in range(200))
+
+
+class StaticFilesTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        source = os.path.join(self.directory, "source", "css")
+        os.makedirs(source)
+        with open(os.path.join(source, "site.css"), "w") as output:
+            output.write(STYLE)
+        with open(os.path.join(source, "tiny.css"), "w") as output:
+            output.write("a { color: red; }")
+        self.root = os.path.join(self.directory, "static")
+        with override_settings(
+            STATIC_ROOT=self.root,
+            STATICFILES_DIRS=[os.path.join(self.directory, "source")],
+            STATICFILES_STORAGE=(
+                "yatube.staticfiles.CompressedManifestStaticFilesStorage"
+            ),
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0,
+                         stdout=StringIO())
+        self.hashed = next(
+            name for name in os.listdir(os.path.join(self.root, "css"))
+            if name.startswith("site.") and name.endswith(".css")
+            and name != "site.css"
+        )
+        self.app_calls = []
+        self.middleware = StaticFilesMiddleware(
+            self.app, root=self.root, prefix="/static/"
+        )
+
+    def app(self, environ, start_response):
+        self.app_calls.append(environ["PATH_INFO"])
+        start_response("404 Not Found", [])
+        return [b"app"]
+
+    def get(self, path, **headers):
+        environ = {"PATH_INFO": path, **headers}
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, response_headers):
+            response["status"] = status
+            response["headers"] = dict(response_headers)
+
+        response["body"] = b"".join(self.middleware(environ, start_response))
+        return response
+
+    def test_collectstatic_writes_compressed_copies(self):
+        path = os.path.join(self.root, "css", self.hashed)
+        with gzip.open(path + ".gz", "rt") as source:
+            self.assertEqual(source.read(), STYLE)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.root, "css", "site.css.gz")
+        ))
+        self.assertFalse(any(
+            name.endswith(".gz") and name.startswith("tiny.")
+            for name in os.listdir(os.path.join(self.root, "css"))
+        ))
+
+    def test_missing_manifest_entry(self):
+        storage = CompressedManifestStaticFilesStorage(location=self.root)
+        self.assertIn(".css", storage.url("css/site.css"))
+        self.assertNotEqual(storage.url("css/site.css"),
+                            "/static/css/site.css")
+        with self.settings(DEBUG=False):
+            with self.assertRaises(ValueError):
+                storage.url("css/missing.css")
+        empty = CompressedManifestStaticFilesStorage(
+            location=os.path.join(self.directory, "source")
+        )
+        with self.settings(DEBUG=False):
+            with self.assertLogs("yatube.staticfiles", "WARNING"):
+                self.assertEqual(empty.url("css/site.css"),
+                                 "/static/css/site.css")
+
+    def test_hashed_file_is_immutable_and_gzipped(self):
+        response = self.get(f"/static/css/{self.hashed}",
+                            HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["status"], "200 OK")
+        headers = response["headers"]
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertIn("immutable", headers["Cache-Control"])
+        self.assertEqual(gzip.decompress(response["body"]).decode(), STYLE)
+        self.assertEqual(headers["Content-Length"],
+                         str(len(response["body"])))
+
+    def test_identity_without_accept_encoding(self):
+        response = self.get(f"/static/css/{self.hashed}",
+                            HTTP_ACCEPT_ENCODING="gzip;q=0")
+        self.assertNotIn("Content-Encoding", response["headers"])
+        self.assertEqual(response["body"].decode(), STYLE)
+
+    def test_unhashed_name_is_revalidated(self):
+        response = self.get("/static/css/site.css")
+        self.assertEqual(response["status"], "200 OK")
+        self.assertNotIn("immutable", response["headers"]["Cache-Control"])
+
+    def test_not_modified(self):
+        etag = self.get(f"/static/css/{self.hashed}")["headers"]["ETag"]
+        response = self.get(f"/static/css/{self.hashed}",
+                            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response["status"], "304 Not Modified")
+        self.assertEqual(response["body"], b"")
+
+    def test_each_encoding_has_own_etag(self):
+        url = f"/static/css/{self.hashed}"
+        gzipped = self.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        plain = self.get(url)
+        self.assertNotEqual(gzipped["headers"]["ETag"],
+                            plain["headers"]["ETag"])
+        response = self.get(url, HTTP_IF_NONE_MATCH=gzipped["headers"]["ETag"])
+        self.assertEqual(response["status"], "200 OK")
+
+    def test_if_none_match_lists_and_weak_tags(self):
+        url = f"/static/css/{self.hashed}"
+        etag = self.get(url)["headers"]["ETag"]
+        for header in (f'"other", {etag}', f"W/{etag}", "*"):
+            with self.subTest(header):
+                response = self.get(url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response["status"], "304 Not Modified")
+
+    def test_head_has_no_body(self):
+        response = self.get(f"/static/css/{self.hashed}",
+                            REQUEST_METHOD="HEAD")
+        self.assertEqual(response["status"], "200 OK")
+        self.assertEqual(response["body"], b"")
+        self.assertEqual(response["headers"]["Content-Length"],
+                         str(len(STYLE)))
+
+    def test_other_paths_go_to_application(self):
+        for path in ("/", "/static/css/missing.css",
+                     "/static/../static/css/site.css",
+                     "/static/staticfiles.json.gz"):
+            self.assertEqual(self.get(path)["body"], b"app")
+        self.assertEqual(len(self.app_calls), 4)
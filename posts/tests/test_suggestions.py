@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import suggestions
+from posts.models import Follow, Post, Suggestion, User, UserStats
+
+
+class SuggestionsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = {
+            name: User.objects.create_user(username=name)
+            for name in ("reader", "b", "c", "d", "e", "f")
+        }
+        for user, author in (("reader", "b"), ("reader", "c"),
+                             ("b", "c"), ("b", "d"), ("c", "d"),
+                             ("c", "e"), ("c", "f"), ("b", "reader")):
+            self.follow(user, author)
+        Post.objects.create(text="Свежая запись", author=self.users["f"])
+
+    def follow(self, user, author):
+        Follow.objects.create(user=self.users[user],
+                              author=self.users[author])
+
+    def suggested(self, name):
+        return [
+            suggestion.author.username
+            for suggestion in suggestions.for_user(self.users[name].pk)
+        ]
+
+    def test_friends_of_friends_ranked_by_overlap_and_activity(self):
+        suggestions.run(full=True)
+        self.assertEqual(self.suggested("reader"), ["d", "f", "e"])
+
+    def test_only_changed_users_are_refreshed(self):
+        self.assertEqual(suggestions.run(), len(self.users))
+        self.assertEqual(suggestions.run(), 0)
+        self.follow("reader", "d")
+        self.assertNotIn("d", self.suggested("reader"))
+        self.assertTrue(
+            UserStats.objects.get(user=self.users["reader"])
+            .suggestions_stale
+        )
+        self.assertEqual(suggestions.run(), 1)
+        self.assertEqual(self.suggested("reader"), ["f", "e"])
+
+    def test_suggestions_shown_to_owner_and_in_follow_feed(self):
+        suggestions.run(full=True)
+        client = Client()
+        client.force_login(self.users["reader"])
+        self.assertContains(client.get(reverse("profile", args=["reader"])),
+                            "Кого читать")
+        self.assertNotContains(client.get(reverse("profile", args=["b"])),
+                               "Кого читать")
+        self.assertContains(client.get(reverse("follow_index")),
+                            "Кого читать")
+
+    def test_page_reads_suggestions_with_one_query(self):
+        suggestions.run(full=True)
+        self.assertTrue(Suggestion.objects.exists())
+        with self.assertNumQueries(1):
+            suggestions.for_user(self.users["reader"].pk)
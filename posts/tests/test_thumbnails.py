@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+
+from posts import thumbnails
+from posts.cards import render_cards
+from posts.models import Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_file(name="photo.png", size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new("RGBA", size, (200, 30, 30, 255)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class PostImageRenditionsTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="photographer")
+
+    def card(self, post):
+        post = Post.objects.select_related("author", "group").get(pk=post.pk)
+        return render_cards([post], None)[0]
+
+    def test_renditions_are_ready_after_save(self):
+        post = Post.objects.create(
+            text="Снимок", author=self.author, image=image_file()
+        )
+        for path, size, image_format in thumbnails.targets(post.image.name):
+            with Image.open(path) as rendition:
+                self.assertEqual(rendition.size, size)
+                self.assertEqual(rendition.format, image_format)
+        card = self.card(post)
+        self.assertIn('type="image/webp"', card)
+        self.assertIn("960x339.jpeg", card)
+        self.assertIn("480x170.webp 480w", card)
+
+    def test_original_is_shown_until_renditions_exist(self):
+        post = Post.objects.create(
+            text="Снимок", author=self.author, image=image_file()
+        )
+        for path, _, _ in thumbnails.targets(post.image.name):
+            os.remove(path)
+        cache.clear()
+        card = self.card(post)
+        self.assertNotIn("<picture>", card)
+        self.assertIn(post.image.url, card)
+
+    def test_new_image_replaces_cached_card(self):
+        post = Post.objects.create(text="Без снимка", author=self.author)
+        self.assertNotIn("<img", self.card(post))
+        post.image = image_file("second.png")
+        post.save()
+        self.assertIn("<picture>", self.card(post))
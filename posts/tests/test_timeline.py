@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader")
+        self.author = User.objects.create_user(username="writer")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def follow(self):
+        self.client.get(reverse("profile_follow", kwargs={
+            "username": self.author.username
+        }))
+
+    def test_new_post_fans_out_to_followers(self):
+        self.follow()
+        post = Post.objects.create(text="Новая запись", author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        response = self.client.get(reverse("follow_index"))
+        self.assertIn(post, response.context.get("page"))
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        post = Post.objects.create(text="Старая запись", author=self.author)
+        self.follow()
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.client.get(reverse("profile_unfollow", kwargs={
+            "username": self.author.username
+        }))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+
+    @override_settings(TIMELINE_MAX_LENGTH=3)
+    def test_timeline_is_capped(self):
+        self.follow()
+        posts = [
+            Post.objects.create(text=f"Запись {i}", author=self.author)
+            for i in range(5)
+        ]
+        entries = TimelineEntry.objects.filter(user=self.user)
+        self.assertEqual(entries.count(), 3)
+        self.assertEqual(
+            set(entries.values_list("post_id", flat=True)),
+            {post.id for post in posts[-3:]}
+        )
+
+    @override_settings(TIMELINE_MAX_LENGTH=3)
+    def test_fan_out_trims_only_full_timelines(self):
+        self.follow()
+        Post.objects.create(text="Запись", author=self.author)
+        with CaptureQueriesContext(connection) as context:
+            Post.objects.create(text="Ещё запись", author=self.author)
+        statements = " ".join(query["sql"] for query in context)
+        self.assertNotIn("COUNT(", statements)
+        self.assertNotIn("DELETE", statements)
+
+    def test_rebuild_timelines_command(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text="Запись", author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command("rebuild_timelines", stdout=StringIO())
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import trending
+from posts.models import Comment, Post, TrendingScore, User
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author")
+        self.reader = User.objects.create_user(username="reader")
+        self.quiet, self.busy, self.hot = (
+            Post.objects.create(text=text, author=self.author)
+            for text in ("Тихая", "Обсуждаемая", "Свежая")
+        )
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(post=post, author=self.reader, text="!")
+
+    def test_comments_raise_score_and_feed_is_ordered(self):
+        self.comment(self.busy, 3)
+        self.comment(self.hot, 1)
+        self.assertEqual(TrendingScore.objects.get(post=self.busy).score, 3)
+        self.assertEqual(trending.top(10), [self.busy, self.hot])
+        response = Client().get(reverse("trending"))
+        self.assertEqual(list(response.context["posts"]),
+                         [self.busy, self.hot])
+        self.assertContains(response, "Обсуждаемая")
+        self.assertNotContains(response, "Тихая")
+
+    def test_decay_lets_newer_discussion_overtake(self):
+        self.comment(self.busy, 3)
+        trending.decay(trending.HALF_LIFE * 2)
+        self.assertAlmostEqual(
+            TrendingScore.objects.get(post=self.busy).score, 0.75
+        )
+        self.comment(self.hot, 1)
+        self.assertEqual(trending.top(10), [self.hot, self.busy])
+        self.assertEqual(trending.decay(trending.HALF_LIFE * 10), 2)
+        self.assertEqual(trending.top(10), [])
+
+    def test_feed_is_one_query(self):
+        self.comment(self.busy)
+        with self.assertNumQueries(1):
+            trending.top(10)
@@ -248,15 +248,20 @@ class PagesTest(TestCase):
 
     def test_cache_index_page(self):
         cached_content = self.authorized_client.get(reverse("index")).content
+        Post.objects.filter(pk=PagesTest.post.pk).update(
+            text="Правка в обход сигналов"
+        )
+        response = self.authorized_client.get(reverse("index"))
+        self.assertEqual(cached_content, response.content)
         Post.objects.create(
             text="Заголовок тестового поста для проверки кэша",
             author=PagesTest.user
         )
         response = self.authorized_client.get(reverse("index"))
-        self.assertEqual(cached_content, response.content)
-        cache.clear()
-        response = self.authorized_client.get(reverse("index"))
         self.assertNotEqual(cached_content, response.content)
+        self.assertContains(
+            response, "Заголовок тестового поста для проверки кэша"
+        )
 
     def test_succes_follow(self):
         self.authorized_client.get(reverse("profile_follow", kwargs={
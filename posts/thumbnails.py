@@ -0,0 +1,127 @@
+import logging
+import multiprocessing
+import os
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from . import imaging
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+
+_executor = None
+
+
+def _names(image_name):
+    stem = posixpath.splitext(image_name)[0].lstrip("/")
+    base = posixpath.join("renditions", stem)
+    return [
+        (posixpath.join(base, f"{width}x{height}.{extension}"),
+         (width, height), extension)
+        for extension in settings.POST_IMAGE_FORMATS
+        for width, height in settings.POST_IMAGE_RENDITIONS
+    ]
+
+
+def renditions(image_name):
+    """Готовые варианты изображения для <picture>: источники по
+    форматам со srcset и основной адрес. None, пока варианты не готовы.
+
+    Последним пишется последний файл списка, поэтому достаточно
+    проверить только его.
+    """
+    if not image_name:
+        return None
+    names = _names(image_name)
+    if not default_storage.exists(names[-1][0]):
+        return None
+    sources = {}
+    for name, (width, _), extension in names:
+        sources.setdefault(extension, []).append(
+            f"{default_storage.url(name)} {width}w"
+        )
+    card_width, card_height = settings.POST_IMAGE_CARD_SIZE
+    fallback = names[-1][2]
+    return {
+        "sources": [
+            {"type": FORMATS[extension][1], "srcset": ", ".join(srcset)}
+            for extension, srcset in sources.items() if extension != fallback
+        ],
+        "srcset": ", ".join(sources[fallback]),
+        "src": default_storage.url(posixpath.join(
+            posixpath.dirname(names[-1][0]),
+            f"{card_width}x{card_height}.{fallback}"
+        )),
+        "width": card_width,
+        "height": card_height,
+    }
+
+
+def targets(image_name):
+    return [
+        (default_storage.path(name), size, FORMATS[extension][0])
+        for name, size, extension in _names(image_name)
+    ]
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        # spawn: дочерние процессы не наследуют потоки и соединения
+        # с базой процесса-сервера.
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def _finished(image_name, done):
+    def callback(future):
+        global _executor
+        error = future.exception()
+        if error is None:
+            done()
+            return
+        if isinstance(error, BrokenProcessPool):
+            _executor = None
+        logger.error(
+            "Не удалось подготовить варианты %s", image_name,
+            exc_info=(type(error), error, error.__traceback__)
+        )
+    return callback
+
+
+def generate(image_name, done=None):
+    """Готовит варианты изображения: в пуле процессов, если он настроен,
+    иначе сразу в текущем потоке."""
+    done = done or (lambda: None)
+    try:
+        args = (default_storage.path(image_name), targets(image_name))
+        if settings.THUMBNAIL_WORKERS:
+            future = _pool().submit(imaging.render, *args)
+            future.add_done_callback(_finished(image_name, done))
+            return
+        imaging.render(*args)
+    except Exception:
+        logger.exception("Не удалось подготовить варианты %s", image_name)
+        return
+    done()
+
+
+def schedule(image_name, done=None):
+    """Отправляет изображение в обработку после коммита транзакции,
+    когда файл уже сохранён, а запись видна другим процессам."""
+    transaction.on_commit(lambda: generate(image_name, done))
+
+
+def missing(image_name):
+    return not all(
+        os.path.exists(path) for path, _, _ in targets(image_name)
+    )
@@ -0,0 +1,95 @@
+from django.conf import settings
+
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE = 500
+
+
+def _max_length():
+    return settings.TIMELINE_MAX_LENGTH
+
+
+def trim(user_ids):
+    """Оставляет в лентах пользователей не больше TIMELINE_MAX_LENGTH
+    самых свежих записей."""
+    limit = _max_length()
+    for user_id in user_ids:
+        # Один проход по индексу (user, -pub_date) до позиции limit:
+        # последняя оставляемая запись и следующая, если лента
+        # переполнена. Записи не считаются, а удаление бывает, только
+        # когда есть что удалять.
+        edge = list(
+            TimelineEntry.objects.filter(user_id=user_id)
+            .order_by("-pub_date")
+            .values_list("pub_date", flat=True)[limit - 1:limit + 1]
+        )
+        if len(edge) > 1:
+            TimelineEntry.objects.filter(
+                user_id=user_id, pub_date__lt=edge[0]
+            ).delete()
+
+
+def fan_out(post):
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list("user_id", flat=True)
+    )
+    for start in range(0, len(follower_ids), BATCH_SIZE):
+        batch = follower_ids[start:start + BATCH_SIZE]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post=post,
+                              pub_date=post.pub_date)
+                for user_id in batch
+            ],
+            ignore_conflicts=True,
+        )
+        trim(batch)
+
+
+def backfill(user_id, author_id):
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        "-pub_date"
+    ).values_list("id", "pub_date")[:_max_length()]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id,
+                          pub_date=pub_date)
+            for post_id, pub_date in posts
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim([user_id])
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id
+    ).delete()
+
+
+def rebuild(user_ids=None):
+    follows = Follow.objects.order_by("user_id")
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+        TimelineEntry.objects.filter(user_id__in=user_ids).delete()
+    else:
+        TimelineEntry.objects.all().delete()
+    user_ids = list(follows.values_list("user_id", flat=True).distinct())
+    for user_id in user_ids:
+        posts = Post.objects.filter(
+            author__following__user_id=user_id
+        ).order_by("-pub_date").values_list(
+            "id", "pub_date"
+        )[:_max_length()]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=post_id,
+                              pub_date=pub_date)
+                for post_id, pub_date in posts
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    return len(user_ids)
@@ -0,0 +1,64 @@
+"""Лента популярного: записи по весу, затухающему со временем.
+
+Каждый новый комментарий прибавляет к весу записи COMMENT_WEIGHT.
+Команда decay_trending периодически умножает все веса на
+0.5 ** (прошедшее время / HALF_LIFE) и удаляет записи с весом ниже
+MIN_SCORE, поэтому таблица остаётся маленькой, а лента — чтением
+первых строк индекса по весу.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import TrendingScore
+
+COMMENT_WEIGHT = 1.0
+HALF_LIFE = 6 * 60 * 60
+MIN_SCORE = 0.05
+DECAYED_KEY = "trending:decayed_at"
+
+UPSERT = f"""
+    INSERT INTO {TrendingScore._meta.db_table} (post_id, score)
+    VALUES (%s, %s)
+    ON CONFLICT (post_id) DO UPDATE SET score = score + excluded.score
+"""
+
+
+def record_comment(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT, [post_id, COMMENT_WEIGHT])
+
+
+def top(count):
+    return [
+        entry.post for entry in
+        TrendingScore.objects.select_related(
+            "post__author", "post__group"
+        ).order_by("-score", "-post_id")[:count]
+    ]
+
+
+def decay(elapsed):
+    """Ослабляет веса на ``elapsed`` секунд; возвращает число записей,
+    выбывших из ленты."""
+    factor = 0.5 ** (elapsed / HALF_LIFE)
+    with transaction.atomic():
+        TrendingScore.objects.update(score=F("score") * factor)
+        removed, _ = TrendingScore.objects.filter(
+            score__lt=MIN_SCORE
+        ).delete()
+    return removed
+
+
+def decay_since_last(default_elapsed):
+    """Ослабляет веса на время с прошлого прохода; если оно неизвестно
+    (первый запуск или запись вытеснена из кэша) —
+    на ``default_elapsed`` секунд."""
+    now = time.time()
+    last = cache.get(DECAYED_KEY)
+    elapsed = now - last if last else default_elapsed
+    removed = decay(max(elapsed, 0))
+    cache.set(DECAYED_KEY, now, None)
+    return elapsed, removed
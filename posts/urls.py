@@ -7,6 +7,8 @@ urlpatterns = [
     path("group/<slug:slug>/", views.group_posts, name="group_posts"),
     path("new/", views.new_post, name="new_post"),
     path("follow/", views.follow_index, name="follow_index"),
+    path("search/", views.search_posts, name="search"),
+    path("trending/", views.trending_posts, name="trending"),
     path("<str:username>/follow/", views.profile_follow,
          name="profile_follow"),
     path("<str:username>/unfollow/", views.profile_unfollow,
@@ -16,6 +18,11 @@ urlpatterns = [
         views.add_comment,
         name="add_comment"
     ),
+    path(
+        "<str:username>/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments"
+    ),
     path(
         "<str:username>/<int:post_id>/edit/",
         views.post_edit,
@@ -1,42 +1,78 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from yatube.ratelimit import rate_limit
+
+from . import generations, search, suggestions, trending
+from .conditional import conditional_page, revalidate
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Follow, Group, Post, User, UserStats
+from .paginator import (
+    CursorPaginator, decode_cursor, encode_cursor, newer_than,
+)
 
 POSTS_PER_PAGE = 10
+TRENDING_SIZE = 20
+COMMENTS_PER_PAGE = 20
+
+
+def viewer(request, author=None):
+    if not request.user.is_authenticated:
+        return "anon"
+    if request.user == author:
+        return "owner"
+    return "user"
+
+
+def paginate(request, posts, date_field="pub_date"):
+    # Запрос страницы выполняется внутри {% cache %} шаблона: попадание
+    # в кэш фрагментов обходится без него.
+    paginator = CursorPaginator(posts, POSTS_PER_PAGE, date_field)
+    return paginator.get_lazy_page(
+        before=request.GET.get("before"),
+        after=request.GET.get("after"),
+    )
 
 
-@cache_page(20)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.select_related("author", "group")
+    page = paginate(request, post_list)
     return render(
         request,
         "index.html",
-        {"page": page, "paginator": paginator}
+        {
+            "page": page,
+            "paginator": page.paginator,
+            "generation": generations.page_token("index"),
+            "viewer": viewer(request),
+        }
     )
 
 
+@conditional_page
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    generation = generations.page_token("group", group.pk)
+    not_modified = revalidate(request, generation)
+    if not_modified:
+        return not_modified
+    posts = group.posts.select_related("author", "group")
+    page = paginate(request, posts)
     context = {
         "group": group,
         "page": page,
-        "paginator": paginator
+        "paginator": page.paginator,
+        "generation": generation,
+        "viewer": viewer(request),
     }
     return render(request, "group.html", context)
 
 
 @login_required
+@rate_limit("new_post")
+@transaction.atomic
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
@@ -50,12 +86,12 @@ def new_post(request):
     })
 
 
+@conditional_page
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related("stats"),
+        username=username
+    )
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             author=author,
@@ -63,36 +99,116 @@ def profile(request, username):
         ).exists()
     else:
         following = False
+    stats = UserStats.objects.for_user(author)
+    generation = generations.page_token("profile", author.pk)
+    # Рекомендации «кого читать» видит только сам владелец профиля.
+    own = request.user == author
+    not_modified = revalidate(
+        request, generation, following, author.get_full_name(),
+        stats.posts_count, stats.followers_count, stats.following_count,
+        own and generations.token(suggestions.key(author.pk)),
+    )
+    if not_modified:
+        return not_modified
+    posts = author.posts.select_related("author", "group")
+    page = paginate(request, posts)
     return render(request, "profile.html", {
         "author": author,
         "page": page,
-        "paginator": paginator,
-        "count_posts": posts.count,
-        "following": following
+        "paginator": page.paginator,
+        "stats": stats,
+        "count_posts": stats.posts_count,
+        "following": following,
+        "generation": generation,
+        "viewer": viewer(request, author),
+        "suggestions": suggestions.for_user(author.pk) if own else [],
     })
 
 
+@conditional_page
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
-    count_posts = post.author.posts.count
+    post = get_object_or_404(
+        Post.objects.select_related("author__stats", "group"),
+        pk=post_id
+    )
+    stats = UserStats.objects.for_user(post.author)
+    not_modified = revalidate(
+        request,
+        generations.token(
+            generations.key("post", post.pk),
+            generations.key("group", post.group_id),
+        ),
+        post.author.get_full_name(),
+        stats.posts_count, stats.followers_count, stats.following_count,
+    )
+    if not_modified:
+        return not_modified
+    # Лишняя строка показывает, есть ли продолжение; счётчику
+    # comment_count здесь не доверяем — он может расходиться с таблицей.
+    comments = post.comments.select_related("author").order_by(
+        "created", "pk"
+    )[:COMMENTS_PER_PAGE + 1]
+    more_comments = None
+    if len(comments) > COMMENTS_PER_PAGE:
+        last = comments[COMMENTS_PER_PAGE - 1]
+        more_comments = encode_cursor(last.created, last.pk)
     form = CommentForm()
     return render(
         request,
         "post.html",
         {
             "post": post,
-            "count_posts": count_posts,
+            "stats": stats,
+            "count_posts": stats.posts_count,
             "author": post.author,
+            # QuerySet уже выбран; лишнюю строку шаблон отрезает срезом.
             "comments": comments,
+            "comments_per_page": COMMENTS_PER_PAGE,
+            "more_comments": more_comments,
             "form": form
         }
     )
 
 
+def post_comments(request, username, post_id):
+    """Следующая порция комментариев к записи после курсора ``after``
+    для кнопки «Показать ещё»."""
+    post = get_object_or_404(
+        Post.objects.select_related("author"),
+        author__username=username, pk=post_id
+    )
+    comments = post.comments.select_related("author").order_by(
+        "created", "pk"
+    )
+    after = decode_cursor(request.GET.get("after"))
+    if after:
+        created, pk = after
+        comments = comments.filter(newer_than("created", created, pk))
+    comments = list(comments[:COMMENTS_PER_PAGE + 1])
+    more_comments = None
+    if len(comments) > COMMENTS_PER_PAGE:
+        last = comments[COMMENTS_PER_PAGE - 1]
+        more_comments = encode_cursor(last.created, last.pk)
+    return render(
+        request,
+        "includes/comment_list.html",
+        {
+            "post": post,
+            "author": post.author,
+            "comments": comments,
+            "comments_per_page": COMMENTS_PER_PAGE,
+            "more_comments": more_comments,
+        }
+    )
+
+
 @login_required
 def post_edit(request, username, post_id):
-    post_edit = get_object_or_404(Post, author__username=username, id=post_id)
+    post_edit = get_object_or_404(
+        Post.objects.select_related("author"),
+        author__username=username,
+        id=post_id
+    )
     if request.user.username != username:
         return redirect("post", username, post_id)
     form = PostForm(request.POST or None, files=request.FILES or None,
@@ -122,6 +238,8 @@ def server_error(request):
 
 
 @login_required
+@rate_limit("add_comment")
+@transaction.atomic
 def add_comment(request, username, post_id):
     form = CommentForm(request.POST or None)
     post = get_object_or_404(Post, pk=post_id)
@@ -135,17 +253,39 @@ def add_comment(request, username, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.select_related("author", "group").filter(
+        timeline_entries__user=request.user
+    ).annotate(feed_date=F("timeline_entries__pub_date"))
+    page = paginate(request, post_list, date_field="feed_date")
     return render(request, "follow.html", {
         "page": page,
-        "paginator": paginator
+        "paginator": page.paginator,
+        "suggestions": suggestions.for_user(request.user.pk),
+    })
+
+
+def trending_posts(request):
+    return render(request, "trending.html", {
+        "posts": trending.top(TRENDING_SIZE),
+    })
+
+
+def search_posts(request):
+    query = request.GET.get("q", "").strip()
+    page = search.search(
+        Post.objects.select_related("author", "group"),
+        query, POSTS_PER_PAGE, after=request.GET.get("before"),
+    )
+    return render(request, "search.html", {
+        "query": query,
+        "page": page,
+        "paginator": page.paginator,
     })
 
 
 @login_required
+@rate_limit("profile_follow", methods=None)
+@transaction.atomic
 def profile_follow(request, username):
     if request.user.username != username:
         following_user = get_object_or_404(User, username=username)
@@ -154,6 +294,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     unfollowing_user = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=unfollowing_user).delete()
@@ -0,0 +1,279 @@
+"""Кэш, общий для всех процессов одного хоста.
+
+Записи хранятся в SQLite-файле в режиме WAL: читатели не блокируют друг
+друга и писателя, а изменения одного воркера сразу видны остальным.
+Размер ограничен опцией MAX_SIZE (в байтах); при превышении удаляются
+давно не читавшиеся записи. Целые числа хранятся как INTEGER, поэтому
+incr()/decr() выполняются одним UPDATE под блокировкой записи.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .metrics import record_cache
+
+BATCH_SIZE = 500
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS cache (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires REAL,
+        accessed REAL NOT NULL,
+        size INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)",
+    """
+    CREATE TABLE IF NOT EXISTS cache_meta (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('size', 0)",
+)
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._path = location
+        self._max_size = int(options.get("MAX_SIZE", 64 * 1024 * 1024))
+        self._cull_to = self._max_size * (1 - 1 / self._cull_frequency)
+        # Время последнего чтения обновляется не чаще раза в столько
+        # секунд: точный LRU превратил бы каждое чтение в запись.
+        self._touch_interval = float(options.get("TOUCH_INTERVAL", 60))
+        self._busy_timeout = int(options.get("BUSY_TIMEOUT", 5000))
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(
+                self._path, timeout=self._busy_timeout / 1000,
+                isolation_level=None,
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(f"PRAGMA busy_timeout={self._busy_timeout}")
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _write(self):
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _encode(self, value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _decode(self, value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _size(self, key, value):
+        if isinstance(value, int):
+            return len(key) + 8
+        return len(key) + len(value)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _store(self, db, key, value, timeout, now, only_if_missing=False):
+        row = db.execute(
+            "SELECT size, expires FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row and only_if_missing and (row[1] is None or row[1] > now):
+            return False
+        encoded = self._encode(value)
+        size = self._size(key, encoded)
+        db.execute(
+            "INSERT OR REPLACE INTO cache"
+            " (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?)",
+            (key, encoded, self.get_backend_timeout(timeout), now, size),
+        )
+        self._resize(db, size - (row[0] if row else 0))
+        return True
+
+    def _resize(self, db, delta):
+        if delta:
+            db.execute(
+                "UPDATE cache_meta SET value = value + ? WHERE name = 'size'",
+                (delta,),
+            )
+
+    def _cull(self, db, now):
+        total, = db.execute(
+            "SELECT value FROM cache_meta WHERE name = 'size'"
+        ).fetchone()
+        if total <= self._max_size:
+            return
+        freed, = db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache WHERE expires <= ?",
+            (now,),
+        ).fetchone()
+        db.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        total -= freed
+        rows = db.execute("SELECT key, size FROM cache ORDER BY accessed")
+        victims = []
+        for key, size in rows:
+            if total <= self._cull_to:
+                break
+            victims.append((key,))
+            total -= size
+            freed += size
+        rows.close()
+        db.executemany("DELETE FROM cache WHERE key = ?", victims)
+        self._resize(db, -freed)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as db:
+            added = self._store(db, key, value, timeout, now, True)
+            if added:
+                self._cull(db, now)
+        return added
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        items = [(self._key(k, version), v) for k, v in data.items()]
+        with self._write() as db:
+            for key, value in items:
+                self._store(db, key, value, timeout, now)
+            self._cull(db, now)
+        return []
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        now = time.time()
+        rows = []
+        names = list(keys)
+        for start in range(0, len(names), BATCH_SIZE):
+            batch = names[start:start + BATCH_SIZE]
+            marks = ",".join("?" * len(batch))
+            rows += self._db.execute(
+                "SELECT key, value, accessed FROM cache"
+                f" WHERE key IN ({marks})"
+                " AND (expires IS NULL OR expires > ?)",
+                (*batch, now),
+            ).fetchall()
+        record_cache(len(rows), len(keys) - len(rows))
+        stale = [
+            (now, key) for key, _, accessed in rows
+            if now - accessed > self._touch_interval
+        ]
+        if stale:
+            with self._write() as db:
+                db.executemany(
+                    "UPDATE cache SET accessed = ? WHERE key = ?", stale
+                )
+        return {keys[key]: self._decode(value) for key, value, _ in rows}
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as db:
+            touched = db.execute(
+                "UPDATE cache SET expires = ?, accessed = ? WHERE key = ?"
+                " AND (expires IS NULL OR expires > ?)",
+                (self.get_backend_timeout(timeout), now, key, now),
+            ).rowcount
+        return bool(touched)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as db:
+            row = db.execute(
+                "SELECT value, size FROM cache WHERE key = ?"
+                " AND (expires IS NULL OR expires > ?)",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            if isinstance(row[0], int):
+                db.execute(
+                    "UPDATE cache SET value = value + ?, accessed = ?"
+                    " WHERE key = ?",
+                    (delta, now, key),
+                )
+                new_value, = db.execute(
+                    "SELECT value FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+            else:
+                new_value = self._decode(row[0]) + delta
+                encoded = self._encode(new_value)
+                size = self._size(key, encoded)
+                db.execute(
+                    "UPDATE cache SET value = ?, accessed = ?, size = ?"
+                    " WHERE key = ?",
+                    (encoded, now, size, key),
+                )
+                self._resize(db, size - row[1])
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._db.execute(
+            "SELECT 1 FROM cache WHERE key = ?"
+            " AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [(self._key(key, version),) for key in keys]
+        with self._write() as db:
+            for key in keys:
+                row = db.execute(
+                    "SELECT size FROM cache WHERE key = ?", key
+                ).fetchone()
+                if row:
+                    db.execute("DELETE FROM cache WHERE key = ?", key)
+                    self._resize(db, -row[0])
+
+    def clear(self):
+        with self._write() as db:
+            db.execute("DELETE FROM cache")
+            db.execute("UPDATE cache_meta SET value = 0 WHERE name = 'size'")
+
+    def close(self, **kwargs):
+        # Соединения живут в потоках и переиспользуются между запросами.
+        pass
@@ -0,0 +1,384 @@
+"""Метрики сервера в формате Prometheus.
+
+Каждый процесс копит счётчики и гистограммы в памяти и время от времени
+сбрасывает их в свой файл в METRICS_DIR. Страница /metrics складывает
+файлы всех процессов, поэтому опрос любого воркера показывает весь хост.
+Счётчики Prometheus не должны уменьшаться, поэтому снимки завершившихся
+процессов не пропадают: при опросе они прибавляются к общему итогу в
+retired.json и удаляются.
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.template.backends import django as django_backend
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+SIZE_BUCKETS = (
+    1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+)
+
+METRICS = {
+    "yatube_http_requests_total": (
+        "counter", "Обработанные запросы по представлениям и кодам ответа"
+    ),
+    "yatube_http_request_duration_seconds": (
+        "histogram", "Время обработки запроса"
+    ),
+    "yatube_http_response_size_bytes": (
+        "histogram", "Размер тела ответа"
+    ),
+    "yatube_db_queries_total": (
+        "counter", "Число SQL-запросов"
+    ),
+    "yatube_db_query_duration_seconds_total": (
+        "counter", "Суммарное время SQL-запросов"
+    ),
+    "yatube_cache_lookups_total": (
+        "counter", "Чтения ключей кэша: попадания и промахи"
+    ),
+    "yatube_rate_limited_total": (
+        "counter", "Запросы, отклонённые ограничением частоты"
+    ),
+    "yatube_template_renders_total": (
+        "counter", "Отрисовки шаблонов"
+    ),
+    "yatube_template_render_seconds_total": (
+        "counter", "Суммарное время отрисовки шаблонов"
+    ),
+}
+
+RETIRED = "retired.json"
+
+_local = threading.local()
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.path = None
+        self.flushed = 0
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    "buckets": list(buckets),
+                    "counts": [0] * len(buckets),
+                    "sum": 0,
+                    "count": 0,
+                }
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": [
+                    [name, dict(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                "histograms": [
+                    [name, dict(labels), dict(histogram, counts=list(
+                        histogram["counts"]
+                    ))]
+                    for (name, labels), histogram
+                    in self.histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        """Сбрасывает снимок в файл процесса не чаще раза в
+        METRICS_FLUSH_INTERVAL секунд."""
+        now = time.monotonic()
+        if not force and now - self.flushed < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.flushed = now
+        directory = settings.METRICS_DIR
+        if self.path is None or not self.path.startswith(directory):
+            os.makedirs(directory, exist_ok=True)
+            # Уникальное имя: pid может достаться новому процессу.
+            self.path = os.path.join(
+                directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+            )
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as output:
+            json.dump(self.snapshot(), output)
+        os.replace(temporary, self.path)
+
+
+registry = Registry()
+
+
+def _reset_after_fork():
+    global registry
+    registry = Registry()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _alive(filename):
+    """Жив ли процесс, записавший снимок: имя начинается с его pid."""
+    try:
+        os.kill(int(filename.split("-", 1)[0]), 0)
+    except ProcessLookupError:
+        return False
+    except (ValueError, OSError):
+        # Не наш формат имени или чужой процесс — снимок не трогаем.
+        return True
+    return True
+
+
+def _merge(paths):
+    counters = defaultdict(float)
+    histograms = {}
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as source:
+                snapshot = json.load(source)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in snapshot["counters"]:
+            counters[name, tuple(sorted(labels.items()))] += value
+        for name, labels, histogram in snapshot["histograms"]:
+            key = (name, tuple(sorted(labels.items())))
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = dict(histogram)
+                continue
+            total["counts"] = [
+                a + b for a, b in zip(total["counts"], histogram["counts"])
+            ]
+            total["sum"] += histogram["sum"]
+            total["count"] += histogram["count"]
+    return counters, histograms
+
+
+def retire(directory):
+    """Переносит снимки завершившихся процессов в итог retired.json."""
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        # Два одновременных опроса не должны сложить снимок дважды.
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = [
+            os.path.join(directory, filename)
+            for filename in sorted(os.listdir(directory))
+            if filename.endswith(".json") and filename != RETIRED
+            and not _alive(filename)
+        ]
+        if not dead:
+            return
+        retired = os.path.join(directory, RETIRED)
+        counters, histograms = _merge([retired] + dead)
+        with open(f"{retired}.tmp", "w", encoding="utf-8") as output:
+            json.dump({
+                "counters": [
+                    [name, dict(labels), value]
+                    for (name, labels), value in counters.items()
+                ],
+                "histograms": [
+                    [name, dict(labels), histogram]
+                    for (name, labels), histogram in histograms.items()
+                ],
+            }, output)
+        os.replace(f"{retired}.tmp", retired)
+        for path in dead:
+            os.remove(path)
+
+
+def collect(directory):
+    """Складывает снимки всех процессов."""
+    if not os.path.isdir(directory):
+        return defaultdict(float), {}
+    retire(directory)
+    return _merge(
+        os.path.join(directory, filename)
+        for filename in sorted(os.listdir(directory))
+        if filename.endswith(".json")
+    )
+
+
+def _escape(value):
+    return (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def render(counters, histograms):
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+            continue
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(histogram["buckets"],
+                                    histogram["counts"]):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{_labels(labels, le=_number(bound))}"
+                    f" {cumulative}"
+                )
+            lines.append(
+                f"{name}_bucket{_labels(labels, le='+Inf')}"
+                f" {histogram['count']}"
+            )
+            lines.append(
+                f"{name}_sum{_labels(labels)} {_number(histogram['sum'])}"
+            )
+            lines.append(
+                f"{name}_count{_labels(labels)} {histogram['count']}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    registry.flush(force=True)
+    return HttpResponse(
+        render(*collect(settings.METRICS_DIR)),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0
+        self.cache = {"hit": 0, "miss": 0}
+
+
+def record_cache(hits, misses):
+    """Вызывается бэкендом кэша после каждого чтения."""
+    stats = getattr(_local, "stats", None)
+    if stats is not None:
+        stats.cache["hit"] += hits
+        stats.cache["miss"] += misses
+        return
+    for result, count in (("hit", hits), ("miss", misses)):
+        if count:
+            registry.inc("yatube_cache_lookups_total",
+                         {"view": "", "result": result}, count)
+
+
+class MetricsMiddleware:
+    """Время, размер ответа, SQL и кэш каждого запроса с разбивкой по
+    имени представления из urls.py."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            _local.stats.queries += 1
+            _local.stats.query_time += time.perf_counter() - started
+
+    def __call__(self, request):
+        _local.stats = stats = RequestStats()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(self._query)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.stats = None
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else ""
+        labels = {"view": view}
+        registry.inc("yatube_http_requests_total", {
+            "view": view, "method": request.method,
+            "status": response.status_code,
+        })
+        registry.observe("yatube_http_request_duration_seconds", labels,
+                         elapsed, LATENCY_BUCKETS)
+        if not response.streaming:
+            registry.observe("yatube_http_response_size_bytes", labels,
+                             len(response.content), SIZE_BUCKETS)
+        registry.inc("yatube_db_queries_total", labels, stats.queries)
+        registry.inc("yatube_db_query_duration_seconds_total", labels,
+                     stats.query_time)
+        for result, count in stats.cache.items():
+            registry.inc("yatube_cache_lookups_total",
+                         {"view": view, "result": result}, count)
+        registry.flush()
+        return response
+
+
+class Template:
+    def __init__(self, template, name):
+        self.template = template
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(self.template, attr)
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            labels = {"template": self.name}
+            registry.inc("yatube_template_renders_total", labels)
+            registry.inc("yatube_template_render_seconds_total", labels,
+                         time.perf_counter() - started)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблонный бэкенд Django, замеряющий время отрисовки."""
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name), template_name)
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code), "<string>")
@@ -0,0 +1,138 @@
+"""Ограничение частоты запросов к представлениям, которые пишут в базу.
+
+Лимиты задаются в RATE_LIMITS отдельно для каждого представления, на
+пользователя и на IP-адрес: (запросов, за сколько секунд, запас для
+всплеска). Учёт ведётся алгоритмом GCRA — вариантом «ведра с
+жетонами», которому на ключ нужно одно число: теоретическое время
+прибытия следующего запроса (TAT) в миллисекундах. Число меняется
+атомарным ``cache.incr`` общего кэша, поэтому лимит один на все
+процессы. Если TAT отстал от текущего времени (ведро полное), он
+переставляется на «сейчас»; гонка двух запросов в этот момент стоит
+не больше одного лишнего жетона.
+
+Запрос, отклонённый по одному из ключей, не тратит жетоны остальных:
+сначала проверяются все ключи, и только потом жетоны списываются.
+Адрес клиента за обратным прокси берётся из X-Forwarded-For, если
+запрос пришёл с адреса из TRUSTED_PROXIES.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+from . import metrics
+
+# Ключ со временем живёт не дольше суток: после истечения ведро снова
+# полное, что в худшем случае даёт один лишний всплеск в сутки.
+KEY_TIMEOUT = 24 * 60 * 60
+
+
+def _params(count, period, burst):
+    interval = period * 1000 // count
+    return interval, interval * (burst - 1)
+
+
+def _peek(key, count, period, burst):
+    """Сколько секунд ждать жетона; ничего не списывает."""
+    _, tolerance = _params(count, period, burst)
+    tat = cache.get(key)
+    if tat is None:
+        return 0
+    return max(0, math.ceil((tat - tolerance - time.time() * 1000) / 1000))
+
+
+def _consume(key, count, period, burst):
+    """Списывает жетон; возвращает 0 или сколько секунд ждать."""
+    interval, tolerance = _params(count, period, burst)
+    now = int(time.time() * 1000)
+    try:
+        tat = cache.incr(key, interval)
+    except ValueError:
+        if cache.add(key, now + interval, KEY_TIMEOUT):
+            return 0
+        tat = cache.incr(key, interval)
+    if tat < now + interval:
+        cache.set(key, now + interval, KEY_TIMEOUT)
+        return 0
+    if tat - now <= tolerance + interval:
+        return 0
+    cache.decr(key, interval)
+    return math.ceil((tat - interval - tolerance - now) / 1000)
+
+
+def _refund(key, count, period, burst):
+    interval, _ = _params(count, period, burst)
+    try:
+        cache.decr(key, interval)
+    except ValueError:
+        pass
+
+
+def client_ip(request):
+    """Адрес клиента. За доверенными прокси из TRUSTED_PROXIES — первый
+    справа адрес X-Forwarded-For, не принадлежащий прокси: левее
+    клиент может дописать что угодно."""
+    address = request.META.get("REMOTE_ADDR", "")
+    if address not in settings.TRUSTED_PROXIES:
+        return address
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    for hop in reversed([a.strip() for a in forwarded.split(",")]):
+        if hop and hop not in settings.TRUSTED_PROXIES:
+            return hop
+    return address
+
+
+def _rejected(name, scope, wait):
+    metrics.registry.inc(
+        "yatube_rate_limited_total", {"view": name, "scope": scope}
+    )
+    return wait
+
+
+def check(request, name):
+    """Секунд до следующей попытки или 0, если запрос можно пропустить."""
+    limits = settings.RATE_LIMITS.get(name, {})
+    scopes = {"ip": client_ip(request)}
+    if request.user.is_authenticated:
+        scopes["user"] = request.user.pk
+    buckets = [
+        (scope, f"ratelimit:{name}:{scope}:{identity}", limits[scope])
+        for scope, identity in scopes.items() if scope in limits
+    ]
+    for scope, key, limit in buckets:
+        wait = _peek(key, *limit)
+        if wait:
+            return _rejected(name, scope, wait)
+    consumed = []
+    for scope, key, limit in buckets:
+        wait = _consume(key, *limit)
+        if wait:
+            # Проверку обогнал параллельный запрос: жетоны других ключей
+            # возвращаются, отклонённый запрос их не тратит.
+            for taken in consumed:
+                _refund(*taken)
+            return _rejected(name, scope, wait)
+        consumed.append((key, *limit))
+    return 0
+
+
+def rate_limit(name, methods=("POST",)):
+    """Отвечает 429 с Retry-After, если запросы к ``name`` идут чаще,
+    чем разрешено в RATE_LIMITS. ``methods=None`` — считать любые
+    запросы, а не только ``methods``."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                wait = check(request, name)
+                if wait:
+                    response = render(request, "misc/429.html",
+                                      {"wait": wait}, status=429)
+                    response["Retry-After"] = str(wait)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
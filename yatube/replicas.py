@@ -0,0 +1,149 @@
+"""Чтение с реплик базы и запись в основную.
+
+Реплики — копии основного файла SQLite, которые команда
+``sync_replicas`` обновляет через backup API; в боевой установке на их
+месте были бы реплики настоящего сервера БД. Чтения моделей из
+REPLICATED_APPS во время запроса уходят на реплику, выбранную в начале
+запроса, запись всегда идёт в основную базу.
+
+Для чтения годятся реплики, скопированные не раньше чем REPLICA_MAX_LAG
+секунд назад. Свежесть отслеживается для каждого пользователя, а не
+для сайта целиком: кто сам что-то записал, REPLICA_PIN_SECONDS секунд
+читает только из основной базы и сразу видит свои записи, остальные
+продолжают читать с реплик. Чтобы данные отстающей реплики не попали
+в кэш под новым поколением, ``generations`` сообщает через
+``catch_up``, когда меняли читаемые данные, и запрос при необходимости
+переходит на основную базу.
+"""
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICATED_APPS = {"posts", "auth"}
+PIN_COOKIE = "primary_until"
+
+_local = threading.local()
+
+
+def synced_key(alias):
+    return f"replicas:synced:{alias}"
+
+
+def choose_replica():
+    """Случайная из реплик, скопированных не раньше REPLICA_MAX_LAG
+    секунд назад, и время её копирования; без таких — основная база."""
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return DEFAULT_DB_ALIAS, None
+    times = cache.get_many([synced_key(alias) for alias in replicas])
+    oldest = time.time() - settings.REPLICA_MAX_LAG
+    fresh = [
+        alias for alias in replicas
+        if times.get(synced_key(alias), 0) >= oldest
+    ]
+    if not fresh:
+        return DEFAULT_DB_ALIAS, None
+    alias = random.choice(fresh)
+    return alias, times[synced_key(alias)]
+
+
+def catch_up(changed_at):
+    """Переводит оставшиеся чтения запроса на основную базу, если
+    реплика запроса скопирована раньше ``changed_at``."""
+    synced_at = getattr(_local, "synced_at", None)
+    if synced_at is not None and synced_at < changed_at:
+        _local.database = DEFAULT_DB_ALIAS
+        _local.synced_at = None
+        _local.lagged = True
+
+
+def lagged():
+    """Читал ли запрос с реплики, отстающей от уже прочитанных
+    поколений: такие данные нельзя кэшировать под этими поколениями."""
+    return getattr(_local, "lagged", False)
+
+
+def sync(alias):
+    """Копирует основную базу в файл реплики и запоминает, на какой
+    момент реплика актуальна."""
+    started = time.time()
+    source = sqlite3.connect(settings.DATABASES[DEFAULT_DB_ALIAS]["NAME"])
+    target = sqlite3.connect(settings.DATABASES[alias]["NAME"])
+    try:
+        # Копия за один шаг: по частям копирование начиналось бы заново
+        # после каждой записи в основную базу.
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    cache.set(synced_key(alias), started, None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in REPLICATED_APPS:
+            return None
+        alias = getattr(_local, "database", None)
+        # Вне запроса решает Django: база объекта из подсказки или
+        # основная.
+        if alias is None:
+            return None
+        # В транзакции читаем то же, во что пишем.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in REPLICATED_APPS:
+            _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики получают схему копированием; прочие базы (например,
+        # у feed_query_plans) мигрируют как обычно.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Выбирает базу для чтений запроса и закрепляет за основной базой
+    тех, кто только что писал."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def pinned(self, request):
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def __call__(self, request):
+        if self.pinned(request):
+            _local.database, _local.synced_at = DEFAULT_DB_ALIAS, None
+        else:
+            _local.database, _local.synced_at = choose_replica()
+        _local.wrote = _local.lagged = False
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = _local.wrote
+            _local.database = _local.synced_at = None
+            _local.wrote = _local.lagged = False
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE,
+                str(time.time() + settings.REPLICA_PIN_SECONDS),
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -10,7 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -49,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
+    'yatube.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,12 +72,19 @@ INTERNAL_IPS = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+TEMPLATE_SOURCE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.metrics.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # В боевом режиме шаблоны разбираются один раз на процесс
+            'loaders': TEMPLATE_SOURCE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_SOURCE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -90,11 +103,33 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite с WAL и прагмами для конкурентного доступа, см.
+        # yatube/sqlite/base.py
+        'ENGINE': 'yatube.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение переиспользуется запросами процесса столько секунд
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Реплики только для чтения: файлы db-replicaN.sqlite3, которые обновляет
+# команда sync_replicas (см. yatube/replicas.py)
+DATABASE_REPLICAS = [
+    f"replica{number}"
+    for number in range(1, int(os.environ.get("YATUBE_DB_REPLICAS", 0)) + 1)
+]
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, f"db-{alias}.sqlite3"),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['yatube.replicas.ReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_PIN_SECONDS = 5
+# Реплики, скопированные раньше чем столько секунд назад, не читаются
+REPLICA_MAX_LAG = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -134,6 +169,9 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
+# Имена с хэшем содержимого и сжатые копии (.gz, .br) после collectstatic;
+# отдаёт их yatube.staticfiles.StaticFilesMiddleware из wsgi.py.
+STATICFILES_STORAGE = "yatube.staticfiles.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -145,8 +183,55 @@ LOGIN_REDIRECT_URL = "index"
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Тесты (manage.py test и pytest) чистят кэш и пишут снимки метрик,
+# поэтому работают со своим временным каталогом и не трогают данные
+# рабочей установки
+TESTING = sys.argv[1:2] == ["test"] or "pytest" in sys.modules
+if TESTING:
+    TEST_DATA_DIR = tempfile.mkdtemp(prefix="yatube-test-")
+    atexit.register(shutil.rmtree, TEST_DATA_DIR, True)
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'yatube.cache.SQLiteCache',
+        'LOCATION': os.path.join(
+            TEST_DATA_DIR if TESTING else BASE_DIR, 'cache.sqlite3'
+        ),
+        'OPTIONS': {
+            'MAX_SIZE': 256 * 1024 * 1024,
+        },
     }
 }
+
+# Максимальное число записей в ленте подписок одного пользователя
+TIMELINE_MAX_LENGTH = 1000
+
+# Варианты изображения записи, которые готовятся сразу после загрузки:
+# размеры кадра (ширина, высота) и форматы; последний формат отдаётся
+# браузерам, не поддерживающим остальные
+POST_IMAGE_RENDITIONS = ((480, 170), (960, 339), (1920, 678))
+POST_IMAGE_FORMATS = ("webp", "jpeg")
+POST_IMAGE_CARD_SIZE = (960, 339)
+# Число процессов, готовящих варианты; 0 — готовить в самом процессе
+# сервера сразу после коммита
+THUMBNAIL_WORKERS = 2
+
+# Ограничение частоты запросов на запись, см. yatube/ratelimit.py:
+# для представления — лимиты на пользователя и на IP-адрес в виде
+# (запросов, за сколько секунд, запас для всплеска)
+RATE_LIMITS = {
+    "new_post": {"user": (30, 3600, 10), "ip": (120, 3600, 30)},
+    "add_comment": {"user": (120, 3600, 20), "ip": (480, 3600, 60)},
+    "profile_follow": {"user": (200, 3600, 50), "ip": (800, 3600, 100)},
+}
+# Адреса обратных прокси: для запросов с них адрес клиента берётся из
+# X-Forwarded-For
+TRUSTED_PROXIES = []
+
+# Метрики Prometheus: каталог для снимков процессов, период сброса
+# снимка (в секундах) и адреса, которым доступна страница /metrics
+METRICS_DIR = os.path.join(
+    TEST_DATA_DIR if TESTING else tempfile.gettempdir(), "yatube-metrics"
+)
+METRICS_FLUSH_INTERVAL = 1
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
@@ -0,0 +1,79 @@
+"""SQLite для боевого режима.
+
+Каждое новое соединение получает прагмы из PRAGMAS (их можно
+переопределить в ``OPTIONS["pragmas"]``): журнал WAL, при котором
+читатели не ждут писателя, ``synchronous=NORMAL``, отображение файла в
+память, увеличенный страничный кэш и ожидание блокировки вместо
+мгновенной ошибки «database is locked».
+
+При CONN_MAX_AGE соединение переживает запрос, поэтому перед первым
+использованием в новом запросе оно проверяется: отвечает ли и не
+подменён ли файл базы (например, при восстановлении из копии). Негодное
+соединение закрывается и открывается заново.
+"""
+import os
+
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_needed = False
+        self.file_id = None
+
+    @property
+    def pragmas(self):
+        return {**PRAGMAS, **self.settings_dict["OPTIONS"].get("pragmas", {})}
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pragmas", None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        self.file_id = self._file_id()
+        return conn
+
+    def _file_id(self):
+        if self.is_in_memory_db():
+            return None
+        try:
+            stat = os.stat(self.settings_dict["NAME"])
+        except OSError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def is_usable(self):
+        if self.file_id != self._file_id():
+            return False
+        try:
+            self.connection.execute("SELECT 1")
+        except base.Database.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        # Вызывается в начале и в конце каждого запроса.
+        super().close_if_unusable_or_obsolete()
+        self.health_check_needed = self.connection is not None
+
+    def ensure_connection(self):
+        if self.health_check_needed and not self.in_atomic_block:
+            self.health_check_needed = False
+            if self.connection is not None and not self.is_usable():
+                self.close()
+        super().ensure_connection()
@@ -0,0 +1,225 @@
+"""Статика без отдельного веб-сервера.
+
+``CompressedManifestStaticFilesStorage`` добавляет к именам файлов хэш
+содержимого (ManifestStaticFilesStorage) и после collectstatic кладёт
+рядом с ними сжатые варианты: ``.gz`` и, если установлен пакет brotli,
+``.br``.
+
+``StaticFilesMiddleware`` оборачивает WSGI-приложение и отдаёт файлы из
+STATIC_ROOT сам, не доходя до Django: выбирает сжатый вариант по
+Accept-Encoding, читает файлы через mmap и разрешает браузерам хранить
+файлы с хэшем в имени сколько угодно (``immutable``).
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import mmap
+import os
+import re
+import threading
+from email.utils import formatdate
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.http import parse_etags
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = {
+    ".css", ".js", ".json", ".map", ".svg", ".txt", ".html", ".xml",
+    ".ico", ".eot", ".ttf", ".otf",
+}
+MIN_SIZE = 256
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+HASHED = re.compile(r"\.[0-9a-f]{12}\.[^/.]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=60"
+CHUNK_SIZE = 256 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.unhashed = set()
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # После collectstatic отсутствие файла в манифесте — битая
+            # ссылка {% static %}, и в боевом режиме она должна падать.
+            # Без манифеста (collectstatic ещё не запускали) остаётся
+            # ссылка без хэша, как в режиме отладки.
+            if not settings.DEBUG and self.exists(self.manifest_name):
+                raise
+            if name not in self.unhashed:
+                self.unhashed.add(name)
+                logger.warning(
+                    "Нет %s в манифесте статики, ссылка без хэша: "
+                    "файл будет кэшироваться браузером недолго", name
+                )
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for name in sorted(set(self.hashed_files.values())):
+                self.compress(name)
+
+    def compress(self, name):
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+            return
+        path = self.path(name)
+        with open(path, "rb") as source:
+            data = source.read()
+        if len(data) < MIN_SIZE:
+            return
+        variants = {".gz": gzip.compress(data, 9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(data)
+        for suffix, compressed in variants.items():
+            # Почти несжимаемые файлы выгоднее отдавать как есть.
+            if len(compressed) >= len(data) * 0.95:
+                continue
+            temporary = f"{path}{suffix}.tmp"
+            with open(temporary, "wb") as output:
+                output.write(compressed)
+            os.replace(temporary, path + suffix)
+
+
+def _accepted(header):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFile:
+    def __init__(self, path, name):
+        stat = os.stat(path)
+        self.path = path
+        self.content_type = (
+            mimetypes.guess_type(name)[0] or "application/octet-stream"
+        )
+        if self.content_type.startswith("text/") or name.endswith(".js"):
+            self.content_type += "; charset=utf-8"
+        self.cache_control = IMMUTABLE if HASHED.search(name) else REVALIDATE
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        digest = hashlib.md5(
+            f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+        ).hexdigest()
+        self.variants = [
+            (coding, path + suffix) for coding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        ]
+        # Свой ETag у каждого сжатого варианта: иначе общий кэш мог бы
+        # подтвердить тело gzip клиенту, который его не распакует.
+        self.etags = {None: f'"{digest}"'}
+        for coding, _ in self.variants:
+            self.etags[coding] = f'"{digest}-{coding}"'
+        self.maps = {}
+        self.lock = threading.Lock()
+
+    def choose(self, accept_encoding):
+        accepted = _accepted(accept_encoding)
+        for coding, path in self.variants:
+            if coding in accepted:
+                return coding, path
+        return None, self.path
+
+    def content(self, path):
+        """Отображённый в память файл; открывается один раз на процесс."""
+        with self.lock:
+            if path not in self.maps:
+                with open(path, "rb") as source:
+                    size = os.fstat(source.fileno()).st_size
+                    self.maps[path] = mmap.mmap(
+                        source.fileno(), 0, access=mmap.ACCESS_READ
+                    ) if size else b""
+            return self.maps[path]
+
+
+def _not_modified(header, etag):
+    """Совпадает ли ETag с If-None-Match; сравнение слабое, как требует
+    RFC 7232 для этого заголовка."""
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag in (
+        tag[2:] if tag.startswith("W/") else tag for tag in etags
+    )
+
+
+def _chunks(content):
+    for start in range(0, len(content), CHUNK_SIZE):
+        yield content[start:start + CHUNK_SIZE]
+
+
+class StaticFilesMiddleware:
+    """WSGI-обёртка, отдающая файлы из STATIC_ROOT по адресам STATIC_URL.
+
+    Список файлов составляется при запуске процесса, поэтому после
+    collectstatic процессы нужно перезапустить. Всё, чего нет в списке,
+    передаётся дальше в приложение.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = {}
+        root = root or settings.STATIC_ROOT
+        for directory, _, names in os.walk(root or ""):
+            for filename in names:
+                if filename.endswith((".gz", ".br", ".tmp")):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, "/")
+                self.files[self.prefix + name] = StaticFile(path, name)
+
+    def __call__(self, environ, start_response):
+        static = self.files.get(environ.get("PATH_INFO", ""))
+        if static is None:
+            return self.application(environ, start_response)
+        method = environ["REQUEST_METHOD"]
+        if method not in ("GET", "HEAD"):
+            start_response("405 Method Not Allowed", [("Allow", "GET, HEAD")])
+            return [b""]
+        coding, path = static.choose(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        headers = [
+            ("Cache-Control", static.cache_control),
+            ("ETag", static.etags[coding]),
+            ("Last-Modified", static.last_modified),
+        ]
+        if static.variants:
+            headers.append(("Vary", "Accept-Encoding"))
+        if _not_modified(environ.get("HTTP_IF_NONE_MATCH"),
+                         static.etags[coding]):
+            start_response("304 Not Modified", headers)
+            return [b""]
+        content = static.content(path)
+        headers += [
+            ("Content-Type", static.content_type),
+            ("Content-Length", str(len(content))),
+        ]
+        if coding:
+            headers.append(("Content-Encoding", coding))
+        start_response("200 OK", headers)
+        if method == "HEAD":
+            return [b""]
+        return _chunks(content)